@@ -1,10 +1,21 @@
 import asyncio
 import logging
+import signal
+from contextlib import suppress
+from datetime import date, datetime, time, timedelta
+from typing import Optional
 
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -12,10 +23,30 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
-from bot.config import Config, load_config
+from bot.config import Config, WebhookConfig, load_config
+from bot.database import (
+    AudienceIndex,
+    CacheSync,
+    RequestsRepo,
+    TopicIndex,
+    UserCache,
+)
 from bot.handlers import get_routers
-from bot.middlewares import ConfigMiddleware, DatabaseMiddleware, SchedulerMiddleware
-from bot.services import schedule_post
+from bot.middlewares import (
+    ConfigMiddleware,
+    DatabaseMiddleware,
+    OutboxMiddleware,
+    SchedulerMiddleware,
+)
+from bot.misc import PostContext, setup_post_context
+from bot.services import (
+    Broadcaster,
+    Outbox,
+    RateLimit,
+    RateLimiter,
+    ScheduledPosts,
+    schedule_post,
+)
 from bot.ui_commands import set_admin_commands
 
 
@@ -24,6 +55,12 @@ def register_global_middlewares(
     config: Config,
     scheduler: AsyncIOScheduler,
     session_maker: async_sessionmaker,
+    outbox: Outbox,
+    user_cache: UserCache,
+    topic_index: TopicIndex,
+    audience_index: AudienceIndex,
+    scheduled_posts: ScheduledPosts,
+    cache_sync: Optional[CacheSync] = None,
 ) -> None:
     """
     Register global middlewares for the given dispatcher.
@@ -32,16 +69,27 @@ def register_global_middlewares(
     :param config: The configuration object from the loaded configuration.
     :param scheduler: The asynchronous scheduler for handling scheduled tasks.
     :param session_maker: The session pool object for the database using SQLAlchemy.
+    :param outbox: The outbox for queuing mass mailings.
+    :param user_cache: The cache of user states shared between updates.
+    :param topic_index: The index of forum topics shared between updates.
+    :param audience_index: The index of category subscribers shared between updates.
+    :param scheduled_posts: The storage of information about scheduled posts.
+    :param cache_sync: (Optional) The channel the caches are kept in step through
+                       between the instances of the bot.
 
     The function registers the following global middlewares for message and callback_query handling:
     1. ConfigMiddleware: Middleware for handling configuration-related operations.
     2. DatabaseMiddleware: Middleware for integrating database operations using SQLAlchemy.
     3. SchedulerMiddleware: Middleware for managing asynchronous scheduled tasks.
+    4. OutboxMiddleware: Middleware for queuing broadcasts in the outbox.
     """
     middleware_types: list = [
         ConfigMiddleware(config),
-        DatabaseMiddleware(session_maker),
-        SchedulerMiddleware(scheduler),
+        DatabaseMiddleware(
+            session_maker, user_cache, topic_index, audience_index, cache_sync
+        ),
+        SchedulerMiddleware(scheduler, scheduled_posts),
+        OutboxMiddleware(outbox),
     ]
     for middleware_type in middleware_types:
         dp.message.outer_middleware(middleware_type)
@@ -54,6 +102,7 @@ def setup_logging() -> None:
 
     This function configures the logging module with the following settings:
     - Logging level is set to ERROR.
+    - Logging level of the bot services is set to INFO, so the broadcast reports are kept.
     - Log messages are written to a file named "logging.log".
     - Log message format includes filename, line number, log level, timestamp, logger name, and the actual log message.
     """
@@ -62,6 +111,61 @@ def setup_logging() -> None:
         filename="logging.log",
         format="%(filename)s:%(lineno)d #%(levelname)-8s [%(asctime)s] - %(name)s - %(message)s",
     )
+    logging.getLogger("bot.services").setLevel(logging.INFO)
+
+
+def get_storage(redis: Optional[Redis]) -> BaseStorage:
+    """
+    Return storage based on the provided configuration.
+
+    :param redis: The Redis client, or None if Redis is not configured.
+    :return: RedisStorage if Redis is configured, so every instance of the bot
+             shares the FSM states, and MemoryStorage otherwise.
+    """
+    if redis is not None:
+        return RedisStorage(
+            redis=redis,
+            key_builder=DefaultKeyBuilder(with_bot_id=True, with_destiny=True),
+        )
+    return MemoryStorage()
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher, webhook: WebhookConfig) -> None:
+    """
+    Receives the updates through a webhook until the process is interrupted
+    or terminated.
+
+    Telegram allows a single getUpdates poller per token, so several instances
+    of the bot run behind a load balancer in this mode instead. Every instance
+    sets the same webhook, and the updates waiting in Telegram are kept.
+
+    :param bot: The bot instance.
+    :param dp: The dispatcher instance.
+    :param webhook: The webhook configuration object.
+    """
+    app: web.Application = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=webhook.secret).register(
+        app, path=webhook.path
+    )
+    setup_application(app, dp, bot=bot)
+
+    await bot.set_webhook(
+        url=f"{webhook.url.rstrip('/')}{webhook.path}",
+        secret_token=webhook.secret,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+    stopped: asyncio.Event = asyncio.Event()
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopped.set)
+
+    runner: web.AppRunner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host=webhook.host, port=webhook.port).start()
+        await stopped.wait()
+    finally:
+        await runner.cleanup()
 
 
 async def main() -> None:
@@ -76,32 +180,126 @@ async def main() -> None:
         engine, expire_on_commit=False
     )
 
+    redis: Optional[Redis] = (
+        Redis.from_url(config.redis.dsn()) if config.redis else None
+    )
+    user_cache: UserCache = UserCache()
+    topic_index: TopicIndex = TopicIndex()
+    audience_index: AudienceIndex = AudienceIndex()
+    cache_sync: Optional[CacheSync] = None
+    cache_sync_task: Optional[asyncio.Task] = None
+    if redis is not None:
+        cache_sync = CacheSync(
+            redis=redis,
+            session_pool=session_maker,
+            cache=user_cache,
+            topics=topic_index,
+            audience=audience_index,
+        )
+        cache_sync_task = asyncio.create_task(cache_sync.run())
+        # Changes made by other instances while the indexes load are not lost.
+        await cache_sync.subscribed.wait()
+
+    session: AsyncSession
+    async with session_maker() as session:
+        repo: RequestsRepo = RequestsRepo(
+            session, topic_index=topic_index, audience_index=audience_index
+        )
+        await repo.users.load_topics()
+        await repo.users.load_audience()
+        if not await repo.users.get_counters():
+            await repo.users.rebuild_counters()
+            await repo.commit()
+
     bot: Bot = Bot(token=config.tg_bot.token, parse_mode=ParseMode.HTML)
-    dp: Dispatcher = Dispatcher(storage=MemoryStorage())
-
-    scheduler: AsyncIOScheduler = AsyncIOScheduler()
-    scheduler.add_job(
-        func=schedule_post,
-        args=(bot, session_maker),
-        trigger="cron",
-        hour=12,
-        minute=0,
-        second=0,
+    dp: Dispatcher = Dispatcher(storage=get_storage(redis=redis))
+    broadcaster: Broadcaster = Broadcaster(bot=bot)
+    outbox: Outbox = Outbox(
+        broadcaster=broadcaster,
+        session_maker=session_maker,
+        audience_index=audience_index,
+        cache_sync=cache_sync,
+    )
+
+    setup_post_context(
+        PostContext(
+            bot=bot,
+            session_pool=session_maker,
+            outbox=outbox,
+            audience_index=audience_index,
+            redis=redis,
+        )
     )
 
-    dp.include_routers(*get_routers())
+    # The scheduler queries the psycopg2 job store on the event loop whenever it
+    # wakes up, i.e. at the delivery slots and when a post is scheduled. These are
+    # a few indexed queries a day, so the blocking is accepted.
+    scheduler: AsyncIOScheduler = AsyncIOScheduler(
+        jobstores={
+            "default": MemoryJobStore(),
+            "posts": SQLAlchemyJobStore(
+                url=config.db.construct_sqlalchemy_url(driver="psycopg2")
+            ),
+        }
+    )
+    window: timedelta = timedelta(minutes=config.delivery.window)
+    slots: int = config.delivery.slots if window else 1
+    start: datetime = datetime.combine(date.today(), time(hour=12))
+    for slot in range(slots):
+        run_time: datetime = start + window * slot / slots
+        scheduler.add_job(
+            func=schedule_post,
+            args=(outbox, session_maker),
+            kwargs=dict(slot=slot, slots=slots, redis=redis),
+            trigger="cron",
+            hour=run_time.hour,
+            minute=run_time.minute,
+            second=run_time.second,
+        )
+
+    rate_limiter: RateLimiter = RateLimiter(
+        limits={
+            "start": RateLimit(rate=1 / 3),
+            "default": RateLimit(rate=2),
+        },
+        redis=redis,
+    )
+    dp["rate_limiter"] = rate_limiter
+    dp["user_cache"] = user_cache
+    dp.include_routers(*get_routers(rate_limiter=rate_limiter, redis=redis))
 
     register_global_middlewares(
-        dp=dp, config=config, scheduler=scheduler, session_maker=session_maker
+        dp=dp,
+        config=config,
+        scheduler=scheduler,
+        session_maker=session_maker,
+        outbox=outbox,
+        user_cache=user_cache,
+        topic_index=topic_index,
+        audience_index=audience_index,
+        scheduled_posts=ScheduledPosts(scheduler),
+        cache_sync=cache_sync,
     )
 
     await set_admin_commands(bot=bot, config=config)
 
+    outbox_task: asyncio.Task = asyncio.create_task(outbox.run())
+
     try:
         scheduler.start()
-        await bot.delete_webhook(drop_pending_updates=True)
-        await dp.start_polling(bot)
+        if config.webhook is not None:
+            await run_webhook(bot=bot, dp=dp, webhook=config.webhook)
+        else:
+            await bot.delete_webhook(drop_pending_updates=True)
+            await dp.start_polling(bot)
     finally:
+        outbox_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await outbox_task
+        if cache_sync_task is not None:
+            cache_sync_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await cache_sync_task
         scheduler.shutdown()
         await engine.dispose()
         await dp.storage.close()
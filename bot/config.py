@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 from environs import Env
 from sqlalchemy.engine.url import URL
@@ -137,6 +137,137 @@ class TgBot:
         )
 
 
+@dataclass
+class RedisConfig:
+    """
+    Redis configuration class.
+    This class holds the settings for Redis, which stores the FSM states and
+    the caches shared between instances of the bot.
+
+    Attributes
+    ----------
+    host : str
+        The host where the Redis server is located.
+    port : int
+        The port where the Redis server is listening.
+    password : Optional[str]
+        The password used to authenticate with Redis.
+    db : int
+        The number of the Redis database.
+    """
+
+    host: str
+    port: int = 6379
+    password: Optional[str] = None
+    db: int = 0
+
+    def dsn(self) -> str:
+        """
+        Constructs and returns a Redis URL for this configuration.
+
+        :return: A Redis connection URL as a string.
+        """
+        if self.password:
+            return f"redis://:{self.password}@{self.host}:{self.port}/{self.db}"
+        return f"redis://{self.host}:{self.port}/{self.db}"
+
+    @staticmethod
+    def from_env(env: Env):
+        """
+        Creates a Redis configuration object.
+
+        :param env: An Env object containing environment settings.
+        :return: A Redis configuration object.
+        """
+        host = env.str("REDIS_HOST")
+        port = env.int("REDIS_PORT", 6379)
+        password = env.str("REDIS_PASSWORD", None)
+        db = env.int("REDIS_DB", 0)
+        return RedisConfig(host=host, port=port, password=password, db=db)
+
+
+@dataclass
+class WebhookConfig:
+    """
+    Webhook configuration class.
+    This class holds the settings for receiving updates through a webhook,
+    which lets several instances of the bot run behind a load balancer.
+
+    Attributes
+    ----------
+    url : str
+        The public URL of the load balancer, e.g. "https://bot.example.com".
+    path : str
+        The path the updates are posted to.
+    host : str
+        The host the web server of the instance listens on.
+    port : int
+        The port the web server of the instance listens on.
+    secret : Optional[str]
+        The secret token Telegram sends with every update.
+    """
+
+    url: str
+    path: str = "/webhook"
+    host: str = "0.0.0.0"
+    port: int = 8080
+    secret: Optional[str] = None
+
+    @staticmethod
+    def from_env(env: Env):
+        """
+        Creates a webhook configuration object.
+
+        :param env: An Env object containing environment settings.
+        :return: A webhook configuration object.
+        """
+        url = env.str("WEBHOOK_URL")
+        path = env.str("WEBHOOK_PATH", "/webhook")
+        host = env.str("WEBHOOK_HOST", "0.0.0.0")
+        port = env.int("WEBHOOK_PORT", 8080)
+        secret = env.str("WEBHOOK_SECRET", None)
+        return WebhookConfig(url=url, path=path, host=host, port=port, secret=secret)
+
+
+@dataclass
+class DeliveryConfig:
+    """
+    Delivery configuration class.
+    This class holds the settings for the daily delivery of missed posts.
+
+    Attributes
+    ----------
+    window : int
+        The number of minutes after 12:00 the delivery is spread across,
+        or 0 to deliver everything at 12:00. Must be less than a day.
+    slots : int
+        The number of slots users are split into within the window, at least 1.
+    """
+
+    window: int = 0
+    slots: int = 12
+
+    def __post_init__(self) -> None:
+        if not 0 <= self.window < 1440:
+            raise ValueError(
+                f"DELIVERY_WINDOW must be between 0 and 1439 minutes, got {self.window}"
+            )
+        if self.slots < 1:
+            raise ValueError(f"DELIVERY_SLOTS must be at least 1, got {self.slots}")
+
+    @staticmethod
+    def from_env(env: Env):
+        """
+        Creates a delivery configuration object.
+
+        :param env: An Env object containing environment settings.
+        :return: A delivery configuration object.
+        """
+        window = env.int("DELIVERY_WINDOW", 0)
+        slots = env.int("DELIVERY_SLOTS", 12)
+        return DeliveryConfig(window=window, slots=slots)
+
+
 @dataclass
 class Config:
     """
@@ -149,10 +280,19 @@ class Config:
         The Telegram bot configuration object
     db: DbConfig
         The db configuration object
+    delivery: DeliveryConfig
+        The delivery configuration object
+    redis: Optional[RedisConfig]
+        The Redis configuration object, or None if the bot keeps its state in memory
+    webhook: Optional[WebhookConfig]
+        The webhook configuration object, or None if the bot polls for updates
     """
 
     tg_bot: TgBot
     db: DbConfig
+    delivery: DeliveryConfig
+    redis: Optional[RedisConfig] = None
+    webhook: Optional[WebhookConfig] = None
 
 
 def load_config(path: str = None) -> Config:
@@ -167,4 +307,9 @@ def load_config(path: str = None) -> Config:
     return Config(
         tg_bot=TgBot.from_env(env),
         db=DbConfig.from_env(env),
+        delivery=DeliveryConfig.from_env(env),
+        redis=RedisConfig.from_env(env) if env.bool("USE_REDIS", False) else None,
+        webhook=(
+            WebhookConfig.from_env(env) if env.bool("USE_WEBHOOK", False) else None
+        ),
     )
@@ -1,12 +1,47 @@
-from .models import Base, Post, User
-from .repo import BaseRepo, PostRepo, RequestsRepo, UserRepo
+from .cache import AudienceIndex, CacheChanges, TopicIndex, UserCache, UserState
+from .models import (
+    Base,
+    BroadcastJob,
+    BroadcastRecipient,
+    Counter,
+    DeliveryStatus,
+    Post,
+    PostContent,
+    Subscription,
+    Topic,
+    User,
+)
+from .repo import (
+    BaseRepo,
+    BroadcastRepo,
+    PostContentRepo,
+    PostRepo,
+    RequestsRepo,
+    UserRepo,
+)
+from .sync import CacheSync
 
 __all__: list[str] = [
     "Base",
     "User",
+    "Subscription",
     "Post",
+    "PostContent",
+    "Topic",
+    "BroadcastJob",
+    "BroadcastRecipient",
+    "DeliveryStatus",
+    "Counter",
     "BaseRepo",
     "RequestsRepo",
     "UserRepo",
     "PostRepo",
+    "PostContentRepo",
+    "BroadcastRepo",
+    "UserCache",
+    "UserState",
+    "TopicIndex",
+    "AudienceIndex",
+    "CacheChanges",
+    "CacheSync",
 ]
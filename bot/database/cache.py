@@ -0,0 +1,294 @@
+import json
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Tuple, Union
+
+from cachetools import TTLCache
+from sqlalchemy import Row
+
+from bot.database.models import Subscription, User
+
+
+@dataclass(frozen=True)
+class UserState:
+    """
+    The part of a user row that the private-chat handlers read on every message.
+
+    Attributes:
+        user_id (int): The Telegram user ID.
+        subscriptions (FrozenSet[str]): The categories the user is subscribed to.
+        active_category (Optional[str]): The category the user is talking in.
+    """
+
+    user_id: int
+    subscriptions: FrozenSet[str]
+    active_category: Optional[str]
+
+    @staticmethod
+    def from_user(user: Union[User, Row]) -> "UserState":
+        """
+        Creates a user state from a User object or a row with the same columns.
+
+        :param user: The User object or row.
+        :return: The state of the user.
+        """
+        return UserState(
+            user_id=user.user_id,
+            subscriptions=Subscription.decode(user.subscriptions),
+            active_category=user.active_category,
+        )
+
+
+class UserCache:
+    """
+    A bounded in-process cache of user states with TTL eviction.
+    UserRepo reads through it and writes every change back to it.
+
+    :param maxsize: The maximum number of cached users.
+    :param ttl: The number of seconds a user state stays cached.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 600) -> None:
+        self.cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, user_id: int) -> Optional[UserState]:
+        """
+        Retrieves a cached user state and counts the hit or the miss.
+
+        :param user_id: The Telegram user ID.
+        :return: The cached state or None if the user is not cached.
+        """
+        state: Optional[UserState] = self.cache.get(user_id)
+        if state is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return state
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        The share of lookups answered from the cache since the start.
+        """
+        lookups: int = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def set(self, state: UserState) -> None:
+        """
+        Stores the state of a user.
+
+        :param state: The state of the user.
+        """
+        self.cache[state.user_id] = state
+
+    def invalidate(self, user_id: int) -> None:
+        """
+        Removes a user from the cache.
+
+        :param user_id: The Telegram user ID.
+        """
+        self.cache.pop(user_id, None)
+
+    def clear(self) -> None:
+        """
+        Removes every user from the cache.
+        """
+        self.cache.clear()
+
+
+class TopicIndex:
+    """
+    An in-process mirror of the topics table in both directions:
+    (chat ID, topic ID) -> user ID and (user ID, category) -> (chat ID, topic ID).
+    It holds every topic of the user base; it is warmed at startup and
+    UserRepo adds every topic it creates or reads.
+    """
+
+    def __init__(self) -> None:
+        self.users: Dict[Tuple[int, int], int] = {}
+        self.topics: Dict[Tuple[int, str], Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.topics)
+
+    def add(self, user_id: int, category: str, chat_id: int, topic_id: int) -> None:
+        """
+        Stores the topic of a user in a category, replacing the previous one.
+
+        :param user_id: The Telegram user ID.
+        :param category: The category of the topic, e.g. "youth_policy".
+        :param chat_id: The ID of the forum chat the topic belongs to.
+        :param topic_id: The ID of the forum topic.
+        """
+        previous: Optional[Tuple[int, int]] = self.topics.get((user_id, category))
+        if previous is not None and previous != (chat_id, topic_id):
+            self.users.pop(previous, None)
+        self.topics[(user_id, category)] = (chat_id, topic_id)
+        self.users[(chat_id, topic_id)] = user_id
+
+    def get_user_id(self, chat_id: int, topic_id: int) -> Optional[int]:
+        """
+        Looks up the user a forum topic belongs to.
+
+        :param chat_id: The ID of the forum chat the topic belongs to.
+        :param topic_id: The ID of the forum topic.
+        :return: The Telegram user ID or None if the topic is not indexed.
+        """
+        return self.users.get((chat_id, topic_id))
+
+    def get_topic_id(self, user_id: int, category: str) -> Optional[int]:
+        """
+        Looks up the forum topic of a user in a category.
+
+        :param user_id: The Telegram user ID.
+        :param category: The category of the topic, e.g. "youth_policy".
+        :return: The ID of the forum topic or None if the topic is not indexed.
+        """
+        topic: Optional[Tuple[int, int]] = self.topics.get((user_id, category))
+        return topic[1] if topic else None
+
+
+class AudienceIndex:
+    """
+    An in-process index of the reachable subscribers of every category,
+    kept as sorted arrays of 64-bit user IDs. It is built at startup and
+    UserRepo applies every committed subscription change to it, so the size
+    of an audience is known without a query.
+    """
+
+    def __init__(self) -> None:
+        self.audiences: Dict[str, array] = {
+            subscription.category: array("q") for subscription in Subscription
+        }
+
+    def count(self, category: str) -> int:
+        """
+        Returns the number of reachable subscribers of a category.
+
+        :param category: The name of the category, e.g. "youth_policy".
+        :return: The size of the audience.
+        """
+        return len(self.audiences[category])
+
+    def update(self, user_id: int, subscriptions: FrozenSet[str]) -> None:
+        """
+        Makes the user a member of exactly the given audiences.
+
+        :param user_id: The Telegram user ID.
+        :param subscriptions: The categories the user is subscribed to.
+        """
+        for category, audience in self.audiences.items():
+            index: int = bisect_left(audience, user_id)
+            found: bool = index < len(audience) and audience[index] == user_id
+            if category in subscriptions and not found:
+                audience.insert(index, user_id)
+            elif category not in subscriptions and found:
+                del audience[index]
+
+    def remove(self, user_id: int) -> None:
+        """
+        Removes the user from every audience, e.g. after they blocked the bot.
+
+        :param user_id: The Telegram user ID.
+        """
+        self.update(user_id=user_id, subscriptions=frozenset())
+
+
+@dataclass
+class CacheChanges:
+    """
+    The changes of a committed transaction that the caches and indexes follow.
+
+    Attributes:
+        states (List[UserState]): The new states of the changed users.
+        topics (List[Tuple[int, str, int, int]]): The created topics as
+            (user ID, category, chat ID, topic ID).
+        unreachable (List[int]): The IDs of the users who blocked the bot.
+    """
+
+    states: List[UserState] = field(default_factory=list)
+    topics: List[Tuple[int, str, int, int]] = field(default_factory=list)
+    unreachable: List[int] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.states or self.topics or self.unreachable)
+
+    def apply(
+        self,
+        cache: Optional[UserCache] = None,
+        topics: Optional[TopicIndex] = None,
+        audience: Optional[AudienceIndex] = None,
+        invalidate: bool = False,
+    ) -> None:
+        """
+        Applies the changes to the cache and the indexes.
+
+        :param cache: (Optional) The cache of user states.
+        :param topics: (Optional) The index of forum topics.
+        :param audience: (Optional) The index of category subscribers.
+        :param invalidate: If True, the changed users are dropped from the cache
+                           instead of being stored, so their state is read again.
+        """
+        for state in self.states:
+            if cache is not None:
+                if invalidate:
+                    cache.invalidate(state.user_id)
+                else:
+                    cache.set(state)
+            if audience is not None:
+                audience.update(
+                    user_id=state.user_id, subscriptions=state.subscriptions
+                )
+        if audience is not None:
+            for user_id in self.unreachable:
+                audience.remove(user_id)
+        if topics is not None:
+            for user_id, category, chat_id, topic_id in self.topics:
+                topics.add(
+                    user_id=user_id,
+                    category=category,
+                    chat_id=chat_id,
+                    topic_id=topic_id,
+                )
+
+    def dumps(self) -> str:
+        """
+        Serializes the changes to JSON.
+
+        :return: The JSON string.
+        """
+        return json.dumps(
+            dict(
+                states=[
+                    [state.user_id, sorted(state.subscriptions), state.active_category]
+                    for state in self.states
+                ],
+                topics=self.topics,
+                unreachable=self.unreachable,
+            )
+        )
+
+    @staticmethod
+    def loads(data: Union[str, bytes]) -> "CacheChanges":
+        """
+        Deserializes the changes from JSON.
+
+        :param data: The JSON string.
+        :return: The changes.
+        """
+        changes: Dict[str, list] = json.loads(data)
+        return CacheChanges(
+            states=[
+                UserState(
+                    user_id=user_id,
+                    subscriptions=frozenset(subscriptions),
+                    active_category=active_category,
+                )
+                for user_id, subscriptions, active_category in changes["states"]
+            ],
+            topics=[tuple(topic) for topic in changes["topics"]],
+            unreachable=changes["unreachable"],
+        )
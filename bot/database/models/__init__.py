@@ -1,9 +1,20 @@
 from .base import Base
+from .broadcast import BroadcastJob, BroadcastRecipient, DeliveryStatus
+from .counter import Counter
 from .post import Post
-from .user import User
+from .post_content import PostContent
+from .topic import Topic
+from .user import Subscription, User
 
 __all__: list[str] = [
     "Base",
     "User",
+    "Subscription",
     "Post",
+    "PostContent",
+    "Topic",
+    "BroadcastJob",
+    "BroadcastRecipient",
+    "DeliveryStatus",
+    "Counter",
 ]
@@ -0,0 +1,75 @@
+from datetime import datetime
+from enum import StrEnum
+from typing import Optional
+
+from sqlalchemy import (
+    BIGINT,
+    INTEGER,
+    SMALLINT,
+    TIMESTAMP,
+    ForeignKey,
+    Index,
+    String,
+    Text,
+    func,
+    text,
+)
+from sqlalchemy.orm import Mapped, mapped_column
+
+from bot.database.models.base import Base
+
+
+class DeliveryStatus(StrEnum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    DONE = "done"
+
+
+class BroadcastJob(Base):
+    __tablename__ = "broadcast_jobs"
+    __table_args__ = (
+        Index(
+            "ix_broadcast_jobs_pending",
+            "id",
+            postgresql_where=text(f"status = '{DeliveryStatus.PENDING}'"),
+        ),
+        Index("ix_broadcast_jobs_post_id", "post_id"),
+    )
+
+    id: Mapped[int] = mapped_column(INTEGER, primary_key=True)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    category: Mapped[Optional[str]] = mapped_column(String(128))
+    post_id: Mapped[Optional[str]] = mapped_column(String(128))
+    chat_id: Mapped[Optional[int]] = mapped_column(BIGINT)
+    priority: Mapped[int] = mapped_column(
+        SMALLINT, default=0, server_default="0", nullable=False
+    )
+    status: Mapped[str] = mapped_column(
+        String(16), server_default=DeliveryStatus.PENDING, nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
+class BroadcastRecipient(Base):
+    __tablename__ = "broadcast_recipients"
+    __table_args__ = (
+        Index(
+            "ix_broadcast_recipients_pending",
+            "job_id",
+            "user_id",
+            postgresql_where=text(f"status = '{DeliveryStatus.PENDING}'"),
+        ),
+    )
+
+    job_id: Mapped[int] = mapped_column(
+        INTEGER, ForeignKey("broadcast_jobs.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
+    status: Mapped[str] = mapped_column(
+        String(16), server_default=DeliveryStatus.PENDING, nullable=False
+    )
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
@@ -0,0 +1,13 @@
+from sqlalchemy import BIGINT, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from bot.database.models.base import Base
+
+
+class Counter(Base):
+    __tablename__ = "counters"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[int] = mapped_column(
+        BIGINT, default=0, server_default="0", nullable=False
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import BIGINT, INTEGER, ForeignKey, String
+from sqlalchemy import BIGINT, INTEGER, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from bot.database.models.base import Base
@@ -6,6 +6,7 @@ from bot.database.models.base import Base
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (Index("ix_posts_user_id_post_id", "user_id", "post_id"),)
 
     id: Mapped[int] = mapped_column(INTEGER, primary_key=True)
     user_id: Mapped[int] = mapped_column(
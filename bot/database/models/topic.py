@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import BIGINT, TIMESTAMP, ForeignKey, Index, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from bot.database.models.base import Base
+
+
+class Topic(Base):
+    __tablename__ = "topics"
+    __table_args__ = (
+        Index("ix_topics_user_id_category", "user_id", "category", unique=True),
+    )
+
+    chat_id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
+    message_thread_id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        BIGINT, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False
+    )
+    category: Mapped[str] = mapped_column(String(128), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now()
+    )
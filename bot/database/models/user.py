@@ -1,13 +1,76 @@
-from typing import Optional
+from datetime import datetime
+from enum import IntFlag
+from typing import FrozenSet, Optional
 
-from sqlalchemy import BIGINT, BOOLEAN, INTEGER, String
+from sqlalchemy import (
+    BIGINT,
+    BOOLEAN,
+    INTEGER,
+    TIMESTAMP,
+    ColumnElement,
+    Index,
+    String,
+    literal_column,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from bot.database.models.base import Base
 
 
+class Subscription(IntFlag):
+    YOUTH_POLICY = 1
+    PSYCHOLOGIST_SUPPORT = 2
+    CIVIC_EDUCATION = 4
+    LEGAL_SUPPORT = 8
+
+    @property
+    def category(self) -> str:
+        """
+        The name of the category, e.g. "youth_policy".
+        """
+        return self.name.lower()
+
+    @classmethod
+    def of(cls, category: str) -> "Subscription":
+        """
+        Returns the bit of a category.
+
+        :param category: The name of the category, e.g. "youth_policy".
+        :return: The bit of the category.
+        """
+        return cls[category.upper()]
+
+    @classmethod
+    def decode(cls, subscriptions: int) -> FrozenSet[str]:
+        """
+        Decodes a subscription bitmask into the names of its categories.
+
+        :param subscriptions: The bitmask stored in users.subscriptions.
+        :return: The names of the subscribed categories.
+        """
+        return frozenset(
+            subscription.category
+            for subscription in cls
+            if subscriptions & subscription
+        )
+
+
 class User(Base):
     __tablename__ = "users"
+    # The predicates are written the way the queries render them
+    # (User.subscribed_to() and User.unreachable.is_(False)),
+    # otherwise PostgreSQL does not use the partial indexes.
+    __table_args__ = tuple(
+        Index(
+            f"ix_users_{subscription.category}",
+            "user_id",
+            postgresql_where=text(
+                f"subscriptions & {subscription.value} <> 0 AND unreachable IS false"
+            ),
+        )
+        for subscription in Subscription
+    )
 
     user_id: Mapped[int] = mapped_column(
         BIGINT, primary_key=True, nullable=False, unique=True
@@ -15,11 +78,26 @@ class User(Base):
     first_name: Mapped[str] = mapped_column(String(128))
     last_name: Mapped[Optional[str]] = mapped_column(String(128))
     username: Mapped[Optional[str]] = mapped_column(String(128))
-    youth_policy: Mapped[bool] = mapped_column(BOOLEAN, default=False)
-    psychologist_support: Mapped[bool] = mapped_column(BOOLEAN, default=False)
-    civic_education: Mapped[bool] = mapped_column(BOOLEAN, default=False)
-    legal_support: Mapped[bool] = mapped_column(BOOLEAN, default=False)
-    youth_policy_topic: Mapped[Optional[int]] = mapped_column(INTEGER)
-    psychologist_support_topic: Mapped[Optional[int]] = mapped_column(INTEGER)
-    legal_support_topic: Mapped[Optional[int]] = mapped_column(INTEGER)
+    subscriptions: Mapped[int] = mapped_column(
+        INTEGER, default=0, server_default="0", nullable=False
+    )
     active_category: Mapped[Optional[str]] = mapped_column(String(128))
+    unreachable: Mapped[bool] = mapped_column(
+        BOOLEAN, default=False, server_default="false", nullable=False
+    )
+    unreachable_at: Mapped[Optional[datetime]] = mapped_column(
+        TIMESTAMP(timezone=True)
+    )
+
+    @classmethod
+    def subscribed_to(cls, category: str) -> ColumnElement[bool]:
+        """
+        Builds the bitwise filter for the subscribers of a category.
+        The bit is rendered as a literal, so the filter matches
+        the partial index of the category.
+
+        :param category: The name of the category, e.g. "youth_policy".
+        :return: The SQL expression "subscriptions & <bit> <> 0".
+        """
+        bit: ColumnElement[int] = literal_column(str(Subscription.of(category).value))
+        return cls.subscriptions.op("&")(bit) != literal_column("0")
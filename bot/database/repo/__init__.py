@@ -1,4 +1,6 @@
 from .base import BaseRepo
+from .broadcasts import BroadcastRepo
+from .post_contents import PostContentRepo
 from .posts import PostRepo
 from .requests import RequestsRepo
 from .users import UserRepo
@@ -8,4 +10,6 @@ __all__: list[str] = [
     "RequestsRepo",
     "UserRepo",
     "PostRepo",
+    "PostContentRepo",
+    "BroadcastRepo",
 ]
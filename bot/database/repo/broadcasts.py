@@ -0,0 +1,259 @@
+from datetime import timedelta
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    BIGINT,
+    Exists,
+    Insert,
+    Select,
+    Update,
+    any_,
+    bindparam,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine.result import Result
+
+from bot.database import BroadcastJob, BroadcastRecipient, DeliveryStatus, User
+from bot.database.repo.base import BaseRepo
+
+
+class BroadcastRepo(BaseRepo):
+    async def add_job(
+        self,
+        text: str,
+        category: Optional[str] = None,
+        post_id: Optional[str] = None,
+        chat_id: Optional[int] = None,
+        user_ids: Optional[Collection[int]] = None,
+        priority: int = 0,
+    ) -> int:
+        """
+        Adds a broadcast to the outbox together with a recipient row for every
+        reachable subscriber of the category.
+        Recipients are copied with a single INSERT ... SELECT; the user IDs are
+        bound as one array parameter, so their number is not limited.
+
+        :param text: The text of the message.
+        :param category: The category whose subscribers receive the message,
+                         or None to send it to all users.
+        :param post_id: The unique ID post, if the broadcast delivers a post.
+        :param chat_id: The chat ID the delivery report is sent to.
+        :param user_ids: (Optional) The Telegram user IDs to limit the recipients to.
+        :param priority: The priority of the job; jobs with a higher priority
+                         are delivered first.
+        :return: The ID of the broadcast job.
+        """
+        job: BroadcastJob = BroadcastJob(
+            text=text,
+            category=category,
+            post_id=post_id,
+            chat_id=chat_id,
+            priority=priority,
+        )
+        self.session.add(job)
+        await self.session.flush()
+
+        users: Select[Tuple[int, int]] = select(literal(job.id), User.user_id).where(
+            User.unreachable.is_(False)
+        )
+        if category is not None:
+            users = users.where(User.subscribed_to(category))
+        if user_ids is not None:
+            users = users.where(
+                User.user_id
+                == any_(bindparam("user_ids", list(user_ids), type_=ARRAY(BIGINT)))
+            )
+        query: Insert = insert(BroadcastRecipient).from_select(
+            ["job_id", "user_id"], users
+        )
+        await self.session.execute(query)
+        return job.id
+
+    async def get_unfinished_jobs(
+        self, min_priority: int = 0
+    ) -> Sequence[BroadcastJob]:
+        """
+        Retrieves the broadcasts that still have recipients to deliver to,
+        highest priority first and oldest first within a priority.
+
+        :param min_priority: The lowest priority of the returned jobs.
+        :return: A list of BroadcastJob objects.
+        """
+        query: Select[Tuple[BroadcastJob]] = (
+            select(BroadcastJob)
+            .where(
+                BroadcastJob.status == DeliveryStatus.PENDING,
+                BroadcastJob.priority >= min_priority,
+            )
+            .order_by(BroadcastJob.priority.desc(), BroadcastJob.id)
+        )
+        return (await self.session.scalars(query)).all()
+
+    async def count_pending(self) -> int:
+        """
+        Counts the recipients still waiting for delivery across all broadcasts.
+
+        :return: The number of pending recipients.
+        """
+        query: Select[Tuple[int]] = select(func.count()).where(
+            BroadcastRecipient.status == DeliveryStatus.PENDING
+        )
+        return await self.session.scalar(query)
+
+    async def claim_recipients(self, job_id: int, limit: int) -> Sequence[int]:
+        """
+        Marks the next batch of pending recipients as being sent and returns them.
+        Rows locked by another worker are skipped, and a claimed recipient is
+        not claimed again until it is released or its claim goes stale.
+
+        :param job_id: The ID of the broadcast job.
+        :param limit: The maximum number of recipients to claim.
+        :return: The Telegram user IDs of the claimed recipients.
+        """
+        pending: Select[Tuple[int]] = (
+            select(BroadcastRecipient.user_id)
+            .where(
+                BroadcastRecipient.job_id == job_id,
+                BroadcastRecipient.status == DeliveryStatus.PENDING,
+            )
+            .order_by(BroadcastRecipient.user_id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        query: Update = (
+            update(BroadcastRecipient)
+            .where(
+                BroadcastRecipient.job_id == job_id,
+                BroadcastRecipient.user_id.in_(pending),
+            )
+            .values(status=DeliveryStatus.SENDING, claimed_at=func.now())
+            .returning(BroadcastRecipient.user_id)
+        )
+        user_ids: Sequence[int] = (await self.session.scalars(query)).all()
+        return user_ids
+
+    async def checkpoint(
+        self, job_id: int, sent: Collection[int], failed: Collection[int]
+    ) -> Sequence[int]:
+        """
+        Records the outcome of a delivered batch.
+        Only recipients that are still being sent are updated, so recording
+        the same batch twice is harmless.
+
+        :param job_id: The ID of the broadcast job.
+        :param sent: The Telegram user IDs the message was delivered to.
+        :param failed: The Telegram user IDs the message could not be delivered to.
+        :return: The Telegram user IDs newly recorded as delivered.
+        """
+        recorded: List[int] = []
+        for status, user_ids in (
+            (DeliveryStatus.SENT, sent),
+            (DeliveryStatus.FAILED, failed),
+        ):
+            if user_ids:
+                query: Update = (
+                    update(BroadcastRecipient)
+                    .where(
+                        BroadcastRecipient.job_id == job_id,
+                        BroadcastRecipient.user_id.in_(user_ids),
+                        BroadcastRecipient.status == DeliveryStatus.SENDING,
+                    )
+                    .values(status=status)
+                    .returning(BroadcastRecipient.user_id)
+                )
+                result: Sequence[int] = (await self.session.scalars(query)).all()
+                if status == DeliveryStatus.SENT:
+                    recorded.extend(result)
+        return recorded
+
+    async def release(self, job_id: int, user_ids: Collection[int]) -> None:
+        """
+        Returns claimed recipients to the queue after an interrupted batch.
+
+        :param job_id: The ID of the broadcast job.
+        :param user_ids: The Telegram user IDs the message was not sent to.
+        """
+        if not user_ids:
+            return
+        await self.session.execute(
+            update(BroadcastRecipient)
+            .where(
+                BroadcastRecipient.job_id == job_id,
+                BroadcastRecipient.user_id.in_(user_ids),
+                BroadcastRecipient.status == DeliveryStatus.SENDING,
+            )
+            .values(status=DeliveryStatus.PENDING, claimed_at=None)
+        )
+
+    async def requeue_stale(self, timeout: float) -> int:
+        """
+        Returns to the queue the recipients claimed by a worker that stopped
+        before it recorded the outcome, e.g. when the process was killed.
+
+        :param timeout: The number of seconds after which a claim is stale.
+        :return: The number of requeued recipients.
+        """
+        query: Update = (
+            update(BroadcastRecipient)
+            .where(
+                BroadcastRecipient.status == DeliveryStatus.SENDING,
+                or_(
+                    BroadcastRecipient.claimed_at.is_(None),
+                    BroadcastRecipient.claimed_at
+                    < func.now() - timedelta(seconds=timeout),
+                ),
+            )
+            .values(status=DeliveryStatus.PENDING, claimed_at=None)
+        )
+        result: Result = await self.session.execute(query)
+        return result.rowcount
+
+    async def finish_job(self, job_id: int) -> Optional[Dict[str, int]]:
+        """
+        Marks a broadcast as finished once none of its recipients is waiting
+        or being sent, e.g. by another instance of the bot.
+        Only the worker that finishes the job gets the statistics, so the job
+        is reported once. The job is then deleted together with its recipients;
+        the delivered posts are already recorded in the posts table.
+
+        :param job_id: The ID of the broadcast job.
+        :return: A dictionary mapping each recipient status to the number of recipients,
+                 or None if the job is not finished yet.
+        """
+        unfinished: Exists = exists().where(
+            BroadcastRecipient.job_id == job_id,
+            BroadcastRecipient.status.in_(
+                (DeliveryStatus.PENDING, DeliveryStatus.SENDING)
+            ),
+        )
+        finished: Optional[int] = await self.session.scalar(
+            update(BroadcastJob)
+            .where(
+                BroadcastJob.id == job_id,
+                BroadcastJob.status == DeliveryStatus.PENDING,
+                ~unfinished,
+            )
+            .values(status=DeliveryStatus.DONE)
+            .returning(BroadcastJob.id)
+        )
+        if finished is None:
+            return None
+        query: Select[Tuple[str, int]] = (
+            select(BroadcastRecipient.status, func.count())
+            .where(BroadcastRecipient.job_id == job_id)
+            .group_by(BroadcastRecipient.status)
+        )
+        result: Result[Tuple[str, int]] = await self.session.execute(query)
+        statistics: Dict[str, int] = dict(result.tuples().all())
+        await self.session.execute(
+            delete(BroadcastJob).where(BroadcastJob.id == job_id)
+        )
+        return statistics
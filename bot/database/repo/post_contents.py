@@ -0,0 +1,40 @@
+from typing import Dict, Sequence, Tuple
+
+from sqlalchemy import Select, select
+from sqlalchemy.engine.result import ScalarResult
+
+from bot.database import PostContent
+from bot.database.repo.base import BaseRepo
+
+
+class PostContentRepo(BaseRepo):
+    async def add_post_content(self, post_id: str, category: str, text: str) -> None:
+        """
+        Adds the content of a post to the database.
+
+        :param post_id: The unique ID post.
+        :param category: The category the post was published in.
+        :param text: The text of the post.
+        """
+        post_content: PostContent = PostContent(
+            id=post_id, category=category, text=text
+        )
+        self.session.add(post_content)
+        await self.session.flush()
+
+    async def get_post_contents(
+        self, post_ids: Sequence[str]
+    ) -> Dict[str, PostContent]:
+        """
+        Retrieves the content of the given posts by their primary keys.
+
+        :param post_ids: The unique IDs of the posts.
+        :return: A dictionary mapping the unique ID post to its content.
+        """
+        if not post_ids:
+            return {}
+        query: Select[Tuple[PostContent]] = select(PostContent).where(
+            PostContent.id.in_(post_ids)
+        )
+        post_contents: ScalarResult[PostContent] = await self.session.scalars(query)
+        return {post_content.id: post_content for post_content in post_contents}
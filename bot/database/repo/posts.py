@@ -1,9 +1,28 @@
-from typing import Optional, Tuple
+from typing import AsyncIterator, List, Optional, Sequence, Tuple, Union
 
-from sqlalchemy import Select, select
+from sqlalchemy import (
+    ColumnElement,
+    Insert,
+    Row,
+    Select,
+    and_,
+    exists,
+    insert,
+    or_,
+    select,
+)
 from sqlalchemy.engine.result import Result
+from sqlalchemy.ext.asyncio import AsyncResult
 
-from bot.database import Post
+from bot.database import (
+    BroadcastJob,
+    BroadcastRecipient,
+    DeliveryStatus,
+    Post,
+    PostContent,
+    Subscription,
+    User,
+)
 from bot.database.repo.base import BaseRepo
 
 
@@ -17,7 +36,20 @@ class PostRepo(BaseRepo):
         """
         post: Post = Post(user_id=user_id, post_id=post_id)
         self.session.add(post)
-        await self.session.commit()
+        await self.session.flush()
+
+    async def add_posts(self, posts: Sequence[Tuple[int, str]]) -> None:
+        """
+        Adds many posts to the database with a single multi-row INSERT.
+
+        :param posts: Pairs of the Telegram user ID and the unique ID post.
+        """
+        if not posts:
+            return
+        query: Insert = insert(Post).values(
+            [dict(user_id=user_id, post_id=post_id) for user_id, post_id in posts]
+        )
+        await self.session.execute(query)
 
     async def get_user_post(self, user_id: int, post_id: str) -> Optional[Post]:
         """
@@ -32,3 +64,89 @@ class PostRepo(BaseRepo):
         )
         result: Result[Tuple[Post]] = await self.session.execute(query)
         return result.scalar_one_or_none()
+
+    @staticmethod
+    def _undelivered(user_id: Union[int, ColumnElement[int]]) -> ColumnElement[bool]:
+        """
+        Builds the condition matching the posts a user has neither received
+        nor is still waiting for in the outbox.
+
+        :param user_id: The Telegram user ID or the column holding it.
+        :return: The condition to filter PostContent rows with.
+        """
+        return and_(
+            ~exists().where(Post.user_id == user_id, Post.post_id == PostContent.id),
+            ~exists().where(
+                BroadcastRecipient.job_id == BroadcastJob.id,
+                BroadcastRecipient.user_id == user_id,
+                BroadcastRecipient.status.in_(
+                    (DeliveryStatus.PENDING, DeliveryStatus.SENDING)
+                ),
+                BroadcastJob.post_id == PostContent.id,
+            ),
+        )
+
+    async def get_pending_post(
+        self, user_id: int, category: str
+    ) -> Optional[PostContent]:
+        """
+        Retrieves the oldest post of a category the user has not received yet.
+
+        :param user_id: The Telegram user ID.
+        :param category: The category of the post, e.g. "youth_policy".
+        :return: The PostContent object, or None if the user is up to date.
+        """
+        query: Select[Tuple[PostContent]] = (
+            select(PostContent)
+            .where(PostContent.category == category, self._undelivered(user_id))
+            .order_by(PostContent.created_at)
+            .limit(1)
+        )
+        return await self.session.scalar(query)
+
+    async def get_pending_posts(
+        self,
+        one_per_user: bool = False,
+        slot: int = 0,
+        slots: int = 1,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[List[Row[Tuple[int, str]]]]:
+        """
+        Retrieves the (user, post) pairs still waiting for delivery with a single
+        anti-join query: reachable subscribers of the post category who have no record
+        of the post and are not waiting for it in the outbox.
+        The pairs are streamed back in batches ordered by user ID.
+
+        :param one_per_user: If True, only the oldest pending post of every user is returned.
+        :param slot: The delivery slot whose users are returned.
+        :param slots: The number of delivery slots users are split into by their ID.
+        :param batch_size: The number of pairs in each batch.
+        :return: An async iterator over batches of (user_id, post_id) rows.
+        """
+        query: Select[Tuple[int, str]] = (
+            select(User.user_id, PostContent.id)
+            .join(
+                PostContent,
+                or_(
+                    *(
+                        and_(
+                            PostContent.category == subscription.category,
+                            User.subscribed_to(subscription.category),
+                        )
+                        for subscription in Subscription
+                    )
+                ),
+            )
+            .where(User.unreachable.is_(False), self._undelivered(User.user_id))
+            .order_by(User.user_id, PostContent.created_at)
+        )
+        if slots > 1:
+            query = query.where(User.user_id % slots == slot)
+        if one_per_user:
+            query = query.distinct(User.user_id)
+
+        result: AsyncResult[Tuple[int, str]] = await self.session.stream(
+            query.execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions():
+            yield partition
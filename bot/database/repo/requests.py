@@ -1,29 +1,144 @@
-from dataclasses import dataclass
+from functools import cached_property
+from types import TracebackType
+from typing import Optional, Type
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from bot.database.cache import AudienceIndex, CacheChanges, TopicIndex, UserCache
+from bot.database.repo.broadcasts import BroadcastRepo
+from bot.database.repo.post_contents import PostContentRepo
 from bot.database.repo.posts import PostRepo
 from bot.database.repo.users import UserRepo
+from bot.database.sync import CacheSync
 
 
-@dataclass
 class RequestsRepo:
     """
     Repository for handling database operations. This class holds all the repositories for the database models.
+
+    The repositories only flush their changes; the transaction is committed once
+    per update by DatabaseMiddleware. Long-running jobs that own their session
+    call commit() themselves to make their progress durable.
+
+    The session is either passed in or opened from the session pool on first use,
+    so updates that never touch the database never open one. Each repository is
+    created once and reused afterwards.
+
+    :param session: (Optional) An already opened database session.
+    :param session_pool: (Optional) The session maker used to open a session lazily.
+    :param user_cache: (Optional) The cache of user states shared between updates.
+    :param topic_index: (Optional) The index of forum topics shared between updates.
+    :param audience_index: (Optional) The index of category subscribers shared
+                           between updates.
+    :param cache_sync: (Optional) The channel the committed changes are published to
+                       for the other instances of the bot.
     """
 
-    session: AsyncSession
+    def __init__(
+        self,
+        session: Optional[AsyncSession] = None,
+        session_pool: Optional[async_sessionmaker] = None,
+        user_cache: Optional[UserCache] = None,
+        topic_index: Optional[TopicIndex] = None,
+        audience_index: Optional[AudienceIndex] = None,
+        cache_sync: Optional[CacheSync] = None,
+    ) -> None:
+        if session is None and session_pool is None:
+            raise ValueError("Either session or session_pool must be provided")
+        self._session = session
+        self.session_pool = session_pool
+        self.user_cache = user_cache
+        self.topic_index = topic_index
+        self.audience_index = audience_index
+        self.cache_sync = cache_sync
+
+    @property
+    def session(self) -> AsyncSession:
+        """
+        The database session, opened from the session pool on first access.
+        """
+        if self._session is None:
+            self._session = self.session_pool()
+        return self._session
 
     @property
+    def opened(self) -> bool:
+        """
+        Whether the session has been opened (or passed in) already.
+        """
+        return self._session is not None
+
+    @cached_property
     def users(self) -> UserRepo:
         """
         The User repository sessions are required to manage user operations.
         """
-        return UserRepo(self.session)
+        return UserRepo(
+            self.session,
+            cache=self.user_cache,
+            topics=self.topic_index,
+            audience=self.audience_index,
+        )
 
-    @property
+    @cached_property
     def posts(self) -> PostRepo:
         """
         The Post repository sessions are required to manage user operations.
         """
         return PostRepo(self.session)
+
+    @cached_property
+    def post_contents(self) -> PostContentRepo:
+        """
+        The PostContent repository sessions are required to manage post content operations.
+        """
+        return PostContentRepo(self.session)
+
+    @cached_property
+    def broadcasts(self) -> BroadcastRepo:
+        """
+        The Broadcast repository sessions are required to manage the broadcast outbox.
+        """
+        return BroadcastRepo(self.session)
+
+    async def commit(self) -> None:
+        """
+        Commits the current transaction and publishes the changed user states
+        to the cache and to the other instances of the bot.
+        Does nothing if the session was never opened.
+        """
+        if not self.opened:
+            return
+        await self.session.commit()
+        changes: CacheChanges = self.users.publish()
+        if self.cache_sync is not None and changes:
+            await self.cache_sync.publish(changes)
+
+    async def rollback(self) -> None:
+        """
+        Rolls back the current transaction and forgets the changed user states.
+        Does nothing if the session was never opened.
+        """
+        if not self.opened:
+            return
+        await self.session.rollback()
+        self.users.discard()
+
+    async def close(self) -> None:
+        """
+        Closes the session if it was opened from the session pool.
+        Sessions passed in by the caller are left to the caller to close.
+        """
+        if self.session_pool is not None and self.opened:
+            await self.session.close()
+
+    async def __aenter__(self) -> "RequestsRepo":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.close()
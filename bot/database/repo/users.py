@@ -1,13 +1,108 @@
-from typing import Dict, List, Optional, Tuple, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Collection,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 
-from sqlalchemy import Select, select
+from sqlalchemy import (
+    Row,
+    Select,
+    Subquery,
+    Update,
+    case,
+    func,
+    literal_column,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import Insert, insert
 from sqlalchemy.engine.result import Result
+from sqlalchemy.ext.asyncio import AsyncResult
+from sqlalchemy.orm import InstrumentedAttribute
 
-from bot.database import User
+from bot.database import (
+    AudienceIndex,
+    CacheChanges,
+    Counter,
+    Subscription,
+    Topic,
+    TopicIndex,
+    User,
+    UserCache,
+    UserState,
+)
 from bot.database.repo.base import BaseRepo
 
 
 class UserRepo(BaseRepo):
+    """
+    A repository for user operations.
+    Reads of the user state go through the cache, and every change
+    is written back to it once the transaction is committed.
+
+    Attributes:
+        state_columns (Tuple[InstrumentedAttribute, ...]): The columns of a user state.
+        cache (Optional[UserCache]): The shared cache of user states.
+        topics (Optional[TopicIndex]): The shared index of forum topics.
+        audience (Optional[AudienceIndex]): The shared index of category subscribers.
+    """
+
+    state_columns: Tuple[InstrumentedAttribute, ...] = (
+        User.user_id,
+        User.subscriptions,
+        User.active_category,
+    )
+
+    def __init__(
+        self,
+        session,
+        cache: Optional[UserCache] = None,
+        topics: Optional[TopicIndex] = None,
+        audience: Optional[AudienceIndex] = None,
+    ) -> None:
+        super().__init__(session)
+        self.cache = cache
+        self.topics = topics
+        self.audience = audience
+
+    def _remember(self, state: UserState) -> UserState:
+        """
+        Keeps the state of a changed user until the transaction is committed.
+
+        :param state: The state of the user.
+        :return: The same state.
+        """
+        self.session.info.setdefault("user_states", {})[state.user_id] = state
+        return state
+
+    def publish(self) -> CacheChanges:
+        """
+        Writes the states of the users and the topics changed in the committed
+        transaction to the cache, the audience index and the topic index.
+
+        :return: The applied changes, for the other instances of the bot.
+        """
+        changes: CacheChanges = CacheChanges(
+            states=list(self.session.info.pop("user_states", {}).values()),
+            topics=self.session.info.pop("topics", []),
+            unreachable=self.session.info.pop("unreachable", []),
+        )
+        changes.apply(cache=self.cache, topics=self.topics, audience=self.audience)
+        return changes
+
+    def discard(self) -> None:
+        """
+        Forgets the states of the users and the topics changed
+        in the rolled back transaction.
+        """
+        self.session.info.pop("user_states", None)
+        self.session.info.pop("topics", None)
+        self.session.info.pop("unreachable", None)
+
     async def get_user(self, user_id: int) -> Optional[User]:
         """
         Retrieves a user from the database by their ID.
@@ -17,25 +112,63 @@ class UserRepo(BaseRepo):
         """
         return await self.session.get(User, user_id)
 
+    async def get_user_state(self, user_id: int) -> Optional[UserState]:
+        """
+        Retrieves the state of a user, from the cache when possible.
+
+        :param user_id: The Telegram user ID.
+        :return: The state of the user or None if the user is not found.
+        """
+        if state := self.session.info.get("user_states", {}).get(user_id):
+            return state
+        if self.cache is not None and (state := self.cache.get(user_id)):
+            return state
+
+        user: Optional[User] = await self.get_user(user_id)
+        if user is None:
+            return None
+        state = UserState.from_user(user)
+        if self.cache is not None:
+            self.cache.set(state)
+        return state
+
     async def add_user(
         self, user_id: int, first_name: str, last_name: str, username: str
-    ) -> None:
+    ) -> UserState:
         """
-        Adds a user to the database or updates an existing user.
+        Adds a user to the database or updates an existing user
+        with a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING statement.
+        A user who comes back is no longer marked as unreachable,
+        and a new user is added to the user counter in the same transaction.
 
         :param user_id: The Telegram user ID.
         :param first_name: The Telegram user first_name.
         :param last_name: The Telegram user last_name.
         :param username: The Telegram user username.
+        :return: The state of the user.
         """
-        user: User = User(
+        query: Insert = insert(User).values(
             user_id=user_id,
             first_name=first_name,
             last_name=last_name,
             username=username,
         )
-        self.session.add(user)
-        await self.session.commit()
+        query = query.on_conflict_do_update(
+            index_elements=[User.user_id],
+            set_=dict(
+                first_name=query.excluded.first_name,
+                last_name=query.excluded.last_name,
+                username=query.excluded.username,
+                unreachable=False,
+                unreachable_at=None,
+            ),
+        ).returning(*self.state_columns, literal_column("xmax = 0").label("inserted"))
+
+        result: Result = await self.session.execute(query)
+        user: Row = result.one()
+        if user.inserted:
+            await self._count({"users": 1})
+        return self._remember(UserState.from_user(user))
 
     async def update_user_subscription(
         self,
@@ -43,14 +176,17 @@ class UserRepo(BaseRepo):
         cancel: bool = False,
         main_menu: bool = False,
         category: Optional[str] = None,
-    ) -> None:
+    ) -> UserState:
         """
-        Renews or cancels a user's subscription to a category.
+        Renews or cancels a user's subscription to a category
+        with a single UPDATE ... RETURNING statement. The subscription counters
+        are updated in the same transaction.
 
         :param user_id: The Telegram user ID.
         :param category: The category that the user wants to update.
         :param cancel: If True, unsubscribe from the specified category.
         :param main_menu: If True, update active category is None
+        :return: The updated state of the user.
         """
         category_mapping: Dict[str, str] = {
             "Молодіжна політика": "youth_policy",
@@ -58,25 +194,43 @@ class UserRepo(BaseRepo):
             "Громадянська освіта": "civic_education",
             "Юридична підтримка": "legal_support",
         }
-        user: Union[User, None] = await self.get_user(user_id)
 
+        values: Dict[str, Any]
         if cancel:
-            setattr(user, user.active_category, False)
-            user.active_category = None
+            values = {
+                "subscriptions": case(
+                    *(
+                        (
+                            User.active_category == key,
+                            User.subscriptions.op("&")(int(~Subscription.of(key))),
+                        )
+                        for key in category_mapping.values()
+                    ),
+                    else_=User.subscriptions,
+                ),
+                "active_category": None,
+            }
         elif main_menu:
-            user.active_category = None
+            return await self._update_user(
+                user_id=user_id, values={"active_category": None}
+            )
         else:
             key = category_mapping.get(" ".join(category.split()[:-1]))
-            setattr(user, key, True)
-            user.active_category = key
+            values = {
+                "subscriptions": User.subscriptions.op("|")(int(Subscription.of(key))),
+                "active_category": key,
+            }
 
-        await self.session.commit()
+        return await self._update_user(
+            user_id=user_id, values=values, count_subscriptions=True
+        )
 
-    async def get_user_subscriptions(self, user_id: int) -> List[str]:
+    @staticmethod
+    def subscription_labels(state: UserState) -> List[str]:
         """
-        Gets a list of user subscriptions.
+        Converts the subscriptions of a user into keyboard labels.
 
-        :param user_id: The Telegram user ID.
+        :param state: The state of the user.
         :return: List of user subscriptions.
         """
         categories: Dict[str, str] = {
@@ -85,56 +239,324 @@ class UserRepo(BaseRepo):
             "civic_education": "Громадянська освіта 🏛",
             "legal_support": "Юридична підтримка ⚖️",
         }
-        user: Union[User, None] = await self.get_user(user_id)
-        subscriptions: List[str] = [
-            categories[category] for category in categories if getattr(user, category)
+        return [
+            categories[category]
+            for category in categories
+            if category in state.subscriptions
         ]
-        return subscriptions
 
-    async def add_topic_id(self, user_id: int, topic_id: int) -> None:
+    async def get_user_subscriptions(self, user_id: int) -> List[str]:
         """
-        Add topic id in database
+        Gets a list of user subscriptions.
 
         :param user_id: The Telegram user ID.
+        :return: List of user subscriptions.
+        """
+        state: Optional[UserState] = await self.get_user_state(user_id)
+        return self.subscription_labels(state)
+
+    async def add_topic_id(
+        self, user_id: int, category: str, chat_id: int, topic_id: int
+    ) -> None:
+        """
+        Add the forum topic of a user in a category, replacing the previous one
+        with a single INSERT ... ON CONFLICT DO UPDATE statement.
+
+        :param user_id: The Telegram user ID.
+        :param category: The category of the topic, e.g. "youth_policy".
+        :param chat_id: The ID of the forum chat the topic belongs to.
         :param topic_id: The ID of the topic related to the user.
         """
-        user: Union[User, None] = await self.get_user(user_id=user_id)
-        setattr(user, f"{user.active_category}_topic", topic_id)
-        await self.session.commit()
+        query: Insert = insert(Topic).values(
+            chat_id=chat_id,
+            message_thread_id=topic_id,
+            user_id=user_id,
+            category=category,
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[Topic.user_id, Topic.category],
+            set_={
+                "chat_id": query.excluded.chat_id,
+                "message_thread_id": query.excluded.message_thread_id,
+            },
+        )
+        await self.session.execute(query)
+        self.session.info.setdefault("topics", []).append(
+            (user_id, category, chat_id, topic_id)
+        )
+
+    async def _update_user(
+        self, user_id: int, values: Dict[str, Any], count_subscriptions: bool = False
+    ) -> UserState:
+        """
+        Updates a user and returns the new state in the same statement.
+
+        :param user_id: The Telegram user ID.
+        :param values: The new values of the columns.
+        :param count_subscriptions: If True, the previous subscriptions are returned
+                                    too, and the subscription counters are updated
+                                    by the difference.
+        :return: The updated state of the user.
+        """
+        query: Update = (
+            update(User)
+            .where(User.user_id == user_id)
+            .values(values)
+            .returning(*self.state_columns)
+            .execution_options(synchronize_session=False)
+        )
+        if count_subscriptions:
+            # The previous row is locked before it is read: the re-check of an
+            # UPDATE blocked by a concurrent one does not re-read other FROM items,
+            # so an unlocked self-join would return the subscriptions from before
+            # the concurrent commit and the counters would be changed twice.
+            previous: Subquery = (
+                select(User.user_id, User.subscriptions)
+                .where(User.user_id == user_id)
+                .with_for_update()
+                .subquery("previous")
+            )
+            query = query.where(previous.c.user_id == User.user_id).returning(
+                previous.c.subscriptions.label("previous")
+            )
+
+        result: Result = await self.session.execute(query)
+        user: Row = result.one()
+        if count_subscriptions:
+            await self._count(
+                {
+                    subscription.category: bool(user.subscriptions & subscription)
+                    - bool(user.previous & subscription)
+                    for subscription in Subscription
+                }
+            )
+        return self._remember(UserState.from_user(user))
 
-    async def get_user_id_by_topic(self, topic_id: int, category: str) -> int:
+    async def _count(self, deltas: Dict[str, int]) -> None:
         """
-        Retrieve a user ID based on a specific topic ID and category.
+        Adds the deltas to the counters with a single INSERT ... ON CONFLICT statement.
 
+        :param deltas: The counter names mapped to the values to add.
+        """
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        query: Insert = insert(Counter).values(
+            [{"name": name, "value": delta} for name, delta in deltas.items()]
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[Counter.name],
+            set_={"value": Counter.value + query.excluded.value},
+        )
+        await self.session.execute(query)
+
+    async def get_counters(self) -> Dict[str, int]:
+        """
+        Retrieve the user and subscription counters.
+
+        :return: The counter names mapped to their values,
+                 e.g. {"users": 120, "youth_policy": 40, ...}.
+        """
+        result: Result[Tuple[str, int]] = await self.session.execute(
+            select(Counter.name, Counter.value)
+        )
+        return {name: value for name, value in result.all()}
+
+    async def rebuild_counters(self) -> Dict[str, int]:
+        """
+        Recount the users and the subscribers of every category
+        with one aggregate query and overwrite the counters.
+
+        :return: The counter names mapped to their new values.
+        """
+        statistics: Row = await self.get_statistics()
+        counters: Dict[str, int] = statistics._asdict()
+        query: Insert = insert(Counter).values(
+            [{"name": name, "value": value} for name, value in counters.items()]
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[Counter.name], set_={"value": query.excluded.value}
+        )
+        await self.session.execute(query)
+        return counters
+
+    async def get_user_id_by_topic(self, chat_id: int, topic_id: int) -> Optional[int]:
+        """
+        Retrieve a user ID based on a forum topic, from the topic index when possible.
+        The database lookup uses the primary key of the topics table.
+        Topics that are not found are not remembered.
+
+        :param chat_id: The ID of the forum chat the topic belongs to.
         :param topic_id: The ID of the topic to search for.
-        :param category: The category to search within.
-        :return: The user ID associated with the provided topic and category.
+        :return: The user ID associated with the provided topic,
+                 or None if the topic does not belong to any user.
+        """
+        if self.topics is not None and (
+            user_id := self.topics.get_user_id(chat_id=chat_id, topic_id=topic_id)
+        ):
+            return user_id
+
+        topic: Optional[Topic] = await self.session.get(Topic, (chat_id, topic_id))
+        if topic is None:
+            return None
+        if self.topics is not None:
+            self.topics.add(
+                user_id=topic.user_id,
+                category=topic.category,
+                chat_id=chat_id,
+                topic_id=topic_id,
+            )
+        return topic.user_id
+
+    async def get_topic_id(self, user_id: int, category: str) -> Optional[int]:
+        """
+        Retrieve the forum topic of a user in a category, from the topic index
+        when possible. The database lookup uses the (user_id, category) index.
+
+        :param user_id: The Telegram user ID.
+        :param category: The category of the topic, e.g. "youth_policy".
+        :return: The ID of the topic or None if the user has no topic in the category.
+        """
+        if self.topics is not None and (
+            topic_id := self.topics.get_topic_id(user_id=user_id, category=category)
+        ):
+            return topic_id
+
+        query: Select[Tuple[int, int]] = select(
+            Topic.chat_id, Topic.message_thread_id
+        ).where(Topic.user_id == user_id, Topic.category == category)
+        result: Result[Tuple[int, int]] = await self.session.execute(query)
+        topic: Optional[Row[Tuple[int, int]]] = result.one_or_none()
+        if topic is None:
+            return None
+        if self.topics is not None:
+            self.topics.add(
+                user_id=user_id,
+                category=category,
+                chat_id=topic.chat_id,
+                topic_id=topic.message_thread_id,
+            )
+        return topic.message_thread_id
+
+    async def load_topics(self, batch_size: int = 1000) -> int:
+        """
+        Load all topics into the topic index through a server-side cursor.
+
+        :param batch_size: The number of rows fetched from the cursor at once.
+        :return: The number of indexed topics.
+        """
+        query: Select[Tuple[int, str, int, int]] = select(
+            Topic.user_id, Topic.category, Topic.chat_id, Topic.message_thread_id
+        ).execution_options(yield_per=batch_size)
+
+        result: AsyncResult = await self.session.stream(query)
+        async for topic in result:
+            self.topics.add(
+                user_id=topic.user_id,
+                category=topic.category,
+                chat_id=topic.chat_id,
+                topic_id=topic.message_thread_id,
+            )
+        return len(self.topics)
+
+    async def iter_users(self, batch_size: int = 1000) -> AsyncIterator[Row]:
+        """
+        Iterate over all users in the database through a server-side cursor.
+        Rows are plain column tuples fetched in batches, so memory stays flat
+        regardless of the table size.
+
+        :param batch_size: The number of rows fetched from the cursor at once.
+        :return: An async iterator over tuples containing user data.
+        """
+        query: Select = select(
+            User.user_id,
+            User.first_name,
+            User.last_name,
+            User.username,
+            *(
+                User.subscribed_to(subscription.category).label(subscription.category)
+                for subscription in Subscription
+            ),
+        ).execution_options(yield_per=batch_size)
+
+        result: AsyncResult = await self.session.stream(query)
+        async for user in result:
+            yield user
+
+    async def get_statistics(self) -> Row[Tuple[int, int, int, int, int]]:
+        """
+        Count the users and the subscribers of every category with one aggregate query
+        over the subscription bitmask.
+
+        :return: A row with the number of users and the number of subscribers
+                 to youth_policy, psychologist_support, civic_education and legal_support.
         """
-        query: Select[Tuple[int]] = select(User.user_id).where(
-            getattr(User, f"{category}_topic") == topic_id
+        query: Select[Tuple[int, int, int, int, int]] = select(
+            func.count().label("users"),
+            *(
+                func.count()
+                .filter(User.subscribed_to(subscription.category))
+                .label(subscription.category)
+                for subscription in Subscription
+            ),
+        )
+        result: Result[Tuple[int, int, int, int, int]] = await self.session.execute(
+            query
+        )
+        return result.one()
+
+    async def count_audience(self, category: str) -> int:
+        """
+        Count the reachable subscribers of a category,
+        from the audience index when possible.
+
+        :param category: The category, e.g. "youth_policy".
+        :return: The size of the audience.
+        """
+        if self.audience is not None:
+            return self.audience.count(category)
+
+        query: Select[Tuple[int]] = select(func.count()).where(
+            User.subscribed_to(category), User.unreachable.is_(False)
         )
         return await self.session.scalar(query)
 
-    async def get_all_users(self) -> List[tuple]:
+    async def load_audience(self, batch_size: int = 1000) -> int:
         """
-        Retrieve a list of all users in the database.
+        Load the reachable subscribers of every category into the audience index
+        through a server-side cursor.
 
-        :return: A list of tuples containing user data.
+        :param batch_size: The number of rows fetched from the cursor at once.
+        :return: The number of indexed users.
         """
-        fields: Tuple[str, ...] = (
-            "user_id",
-            "first_name",
-            "last_name",
-            "username",
-            "youth_policy",
-            "psychologist_support",
-            "civic_education",
-            "legal_support",
+        query: Select[Tuple[int, int]] = (
+            select(User.user_id, User.subscriptions)
+            .where(User.subscriptions != 0, User.unreachable.is_(False))
+            .order_by(User.user_id)
+            .execution_options(yield_per=batch_size)
         )
 
-        users: Result[Tuple[User]] = await self.session.execute(select(User))
-        user_data: List[Tuple] = [
-            tuple(getattr(user, field) for field in fields) for user in users.scalars()
-        ]
+        users: int = 0
+        result: AsyncResult = await self.session.stream(query)
+        async for user in result:
+            self.audience.update(
+                user_id=user.user_id,
+                subscriptions=Subscription.decode(user.subscriptions),
+            )
+            users += 1
+        return users
+
+    async def mark_unreachable(self, user_ids: Collection[int]) -> None:
+        """
+        Flag users who blocked the bot, so broadcasts skip them.
 
-        return user_data
+        :param user_ids: The Telegram user IDs.
+        """
+        if not user_ids:
+            return
+        await self.session.execute(
+            update(User)
+            .where(User.user_id.in_(user_ids))
+            .values(unreachable=True, unreachable_at=func.now())
+        )
+        self.session.info.setdefault("unreachable", []).extend(user_ids)
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import uuid
+from typing import Any, Dict
+
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.database.cache import AudienceIndex, CacheChanges, TopicIndex, UserCache
+from bot.database.repo.users import UserRepo
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class CacheSync:
+    """
+    Keeps the user cache, the topic index and the audience index of every
+    instance of the bot in step through Redis pub/sub.
+
+    Every instance publishes the changes of its committed transactions; the
+    others drop the cached states of the changed users and apply the index
+    changes. The indexes are loaded once subscribed is set, and messages
+    missed while the subscription was down are covered by clearing the cache
+    and reloading the indexes once it is restored.
+
+    :param redis: The Redis client shared by all instances.
+    :param session_pool: The session maker the indexes are reloaded with.
+    :param cache: The cache of user states.
+    :param topics: The index of forum topics.
+    :param audience: The index of category subscribers.
+    :param channel: The Redis channel the changes are published to.
+    :param retry_delay: The number of seconds to wait before resubscribing.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        session_pool: async_sessionmaker,
+        cache: UserCache,
+        topics: TopicIndex,
+        audience: AudienceIndex,
+        channel: str = "cache",
+        retry_delay: float = 5,
+    ) -> None:
+        self.redis = redis
+        self.session_pool = session_pool
+        self.cache = cache
+        self.topics = topics
+        self.audience = audience
+        self.channel = channel
+        self.retry_delay = retry_delay
+        self.instance: str = uuid.uuid4().hex
+        self.subscribed: asyncio.Event = asyncio.Event()
+
+    async def publish(self, changes: CacheChanges) -> None:
+        """
+        Sends the changes of a committed transaction to the other instances.
+        The transaction is already committed, so a failure is only logged.
+
+        :param changes: The changes of the transaction.
+        """
+        try:
+            await self.redis.publish(self.channel, f"{self.instance}:{changes.dumps()}")
+        except Exception:
+            logger.exception("Failed to publish cache changes")
+
+    def receive(self, data: bytes) -> None:
+        """
+        Applies the changes published by another instance.
+
+        :param data: The message from the channel.
+        """
+        instance, changes = data.decode().split(":", 1)
+        if instance == self.instance:
+            return
+        CacheChanges.loads(changes).apply(
+            cache=self.cache,
+            topics=self.topics,
+            audience=self.audience,
+            invalidate=True,
+        )
+
+    async def reload(self) -> None:
+        """
+        Clears the cache and rebuilds the indexes from the database.
+        The indexes are swapped in once they are complete.
+        """
+        session: AsyncSession
+        topics: TopicIndex = TopicIndex()
+        audience: AudienceIndex = AudienceIndex()
+        async with self.session_pool() as session:
+            repo: UserRepo = UserRepo(session, topics=topics, audience=audience)
+            await repo.load_topics()
+            await repo.load_audience()
+        self.cache.clear()
+        self.topics.users, self.topics.topics = topics.users, topics.topics
+        self.audience.audiences = audience.audiences
+
+    async def run(self) -> None:
+        """
+        Listens to the changes of the other instances until cancelled.
+        """
+        resubscribed: bool = False
+        while True:
+            try:
+                pubsub: PubSub
+                async with self.redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    if resubscribed:
+                        await self.reload()
+                    resubscribed = True
+                    self.subscribed.set()
+                    message: Dict[str, Any]
+                    async for message in pubsub.listen():
+                        self.receive(message["data"])
+            except Exception:
+                logger.exception("Cache sync failed, resubscribing")
+                await asyncio.sleep(self.retry_delay)
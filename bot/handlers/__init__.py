@@ -1,24 +1,31 @@
-from typing import Final, List
+from typing import Final, List, Optional
 
 from aiogram import F, Router
+from redis.asyncio import Redis
+
+from bot.services import RateLimiter
 
 from .admin import get_admin_routers
 from .user import get_user_routers
 
 
-def get_routers() -> List[Router]:
+def get_routers(
+    rate_limiter: RateLimiter, redis: Optional[Redis] = None
+) -> List[Router]:
     """
     Get all routers.
 
+    :param rate_limiter: The rate limiter shared by the throttled handlers.
+    :param redis: (Optional) The Redis client the middlewares share their state through.
     :return: A list of Router objects for all interactions.
     """
     admin_router: Final[Router] = Router(name=__name__)
     admin_router.message.filter(F.chat.type != "private")
-    admin_router.include_routers(*get_admin_routers())
+    admin_router.include_routers(*get_admin_routers(redis))
 
     user_router: Final[Router] = Router(name=__name__)
     user_router.message.filter(F.chat.type == "private")
-    user_router.include_routers(*get_user_routers())
+    user_router.include_routers(*get_user_routers(rate_limiter, redis))
 
     return [
         admin_router,
@@ -1,31 +1,35 @@
-from typing import List
+from typing import List, Optional
 
 from aiogram import Router
+from redis.asyncio import Redis
 
 from bot.filters import Admin
 from bot.middlewares import AlbumMiddleware, UserIdMiddleware
 
-from . import all, from_forum, get_db, help, post
+from . import all, from_forum, get_db, help, post, stats
 
 
-def get_admin_routers() -> List[Router]:
+def get_admin_routers(redis: Optional[Redis] = None) -> List[Router]:
     """
     Get a list of routers with admin filters and specific middlewares.
 
+    :param redis: (Optional) The Redis client the middlewares share their state through.
     :return: A list of routers with admin filters and middleware applied.
     """
     all.router.message.filter(Admin())
     get_db.router.message.filter(Admin())
+    stats.router.message.filter(Admin())
     post.router.message.filter(Admin())
     help.router.message.filter(Admin())
     from_forum.router.message.filter(Admin(command=False))
 
-    from_forum.router.message.middleware(AlbumMiddleware())
+    from_forum.router.message.middleware(AlbumMiddleware(redis=redis))
     from_forum.router.message.middleware(UserIdMiddleware())
 
     routers_list: List[Router] = [
         all.router,
         get_db.router,
+        stats.router,
         post.router,
         help.router,
         from_forum.router,
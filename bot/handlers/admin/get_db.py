@@ -1,70 +1,33 @@
-import csv
-import os
-from typing import Final, List, Literal, Union
+import asyncio
+from typing import Final, Set
 
-import aiofiles
-from aiogram import Router
+from aiogram import Bot, Router
 from aiogram.filters import Command
-from aiogram.types import FSInputFile, Message
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from bot.database import RequestsRepo
+from bot.services import export_users
 
 router: Final[Router] = Router(name=__name__)
 
+background_tasks: Final[Set[asyncio.Task]] = set()
+
 
 @router.message(Command("db"))
-async def get_db(message: Message, repo: RequestsRepo) -> None:
+async def get_db(message: Message, bot: Bot, session_pool: async_sessionmaker) -> None:
     """
     Handler to /db commands.
-    Generates a database report in the form of an Excel file and sends it.
+    Acknowledges the request at once and generates the database report
+    in the background.
 
     :param message: The message from Telegram.
-    :param repo: The repository for database requests.
+    :param bot: The bot object used to interact with the Telegram API.
+    :param session_pool: The session pool used by the background export.
     """
-    headers: List[str] = [
-        "ID",
-        "Ім'я",
-        "Прізвище",
-        "Ім'я користувача",
-        "Молодіжна політика",
-        "Психологічна підтримка",
-        "Громадянська освіта",
-        "Юридична підтримка",
-    ]
-
-    data: List[tuple] = await repo.users.get_all_users()
-
-    users: Literal[0] = 0
-    category_counts: List[int] = [0, 0, 0, 0]
-
-    async with aiofiles.open(
-        "users.csv", mode="w", newline="", encoding="utf-8"
-    ) as file:
-        writer = csv.writer(file)
-        await writer.writerow(headers)
+    await message.answer(text="Формуємо базу даних, файл надійде за мить ⏳")
 
-        for row_data in data:
-            users += 1
-            for i in range(4, 8):
-                category_counts[i - 4] += 1 if row_data[i] else 0
-            await writer.writerow(row_data)
-
-    subscription_count: int = sum(category_counts)
-    category_percentages: List[Union[float, int]] = [
-        round((count / subscription_count) * 100, 1) if subscription_count > 0 else 0
-        for count in category_counts
-    ]
-    file_data: FSInputFile = FSInputFile(path="users.csv", filename="users.csv")
-
-    response_text: str = (
-        f"Кількість користувачів у боті - {users}\n"
-        f"Кількість підписок - {subscription_count}\n\n"
-        f"Молодіжна політика - {category_counts[0]} ({category_percentages[0]}%)\n"
-        f"Психологічна підтримка - {category_counts[1]} ({category_percentages[1]}%)\n"
-        f"Громадянська освіта - {category_counts[2]} ({category_percentages[2]}%)\n"
-        f"Юридична підтримка - {category_counts[3]} ({category_percentages[3]}%)\n"
+    task: asyncio.Task = asyncio.create_task(
+        export_users(bot=bot, chat_id=message.chat.id, session_maker=session_pool)
     )
-
-    await message.answer_document(document=file_data, caption=response_text)
-
-    os.remove("users.csv")
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
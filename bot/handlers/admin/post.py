@@ -1,36 +1,38 @@
-from datetime import datetime
-from typing import Any, Dict, Final
+from datetime import datetime, timedelta
+from typing import Any, Dict, Final, List
 
 from aiogram import Bot, F, Router
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from cachetools import LRUCache
 
 from bot.database import RequestsRepo
 from bot.keyboards import cancel_post, cancel_scheduler
-from bot.misc import States, send_post
+from bot.misc import States, get_category, send_post, send_scheduled_post
+from bot.services import Outbox, ScheduledPosts
 
 router: Final[Router] = Router(name=__name__)
 
 
-def scheduled_post(cache: LRUCache) -> str:
+async def scheduled_post(scheduled_posts: ScheduledPosts) -> str:
     """
     Generates a formatted string representing the list of scheduled posts.
 
-    :param cache: The LRUCache to store information about scheduled jobs.
+    :param scheduled_posts: The scheduled posts.
     :return: A string displaying the scheduled posts and a prompt for specifying the time.
     """
+    descriptions: List[str] = await scheduled_posts.descriptions()
     return (
-        f"<b>{'Список запланованих розсилок ⌛️' if cache else ''}\n"
-        f"{''.join(value[1] for value in cache.values())}</b>\n\n"
+        f"<b>{'Список запланованих розсилок ⌛️' if descriptions else ''}\n"
+        f"{''.join(descriptions)}</b>\n\n"
         f"Вкажіть час в форматі DD/MM/hh:mm ⏰"
     )
 
 
 @router.message(Command("post"))
-async def command_post(message: Message, state: FSMContext, cache: LRUCache) -> None:
+async def command_post(
+    message: Message, state: FSMContext, scheduled_posts: ScheduledPosts
+) -> None:
     """
     Handler the /post command.
     Initiating the process of scheduling and sending posts.
@@ -39,7 +41,7 @@ async def command_post(message: Message, state: FSMContext, cache: LRUCache) ->
     :param state: The FSMContext to manage the conversation state.
     """
     await message.answer(
-        text=scheduled_post(cache=cache),
+        text=await scheduled_post(scheduled_posts=scheduled_posts),
         reply_markup=cancel_post(),
     )
     await state.set_state(States.post_datetime)
@@ -47,7 +49,7 @@ async def command_post(message: Message, state: FSMContext, cache: LRUCache) ->
 
 @router.message(States.post_datetime)
 async def post_datetime(
-    message: Message, bot: Bot, state: FSMContext, cache: LRUCache
+    message: Message, bot: Bot, state: FSMContext, scheduled_posts: ScheduledPosts
 ) -> None:
     """
     Handler admin input for setting the post date and time or cancelling the process.
@@ -67,7 +69,7 @@ async def post_datetime(
 
         if target_datetime < current_datetime:
             await bot.edit_message_text(
-                text=scheduled_post(cache=cache),
+                text=await scheduled_post(scheduled_posts=scheduled_posts),
                 chat_id=message.chat.id,
                 message_id=message.message_id - 1,
             )
@@ -80,7 +82,7 @@ async def post_datetime(
                 target_datetime - current_datetime
             ).total_seconds()
             await bot.edit_message_text(
-                text=scheduled_post(cache=cache),
+                text=await scheduled_post(scheduled_posts=scheduled_posts),
                 chat_id=message.chat.id,
                 message_id=message.message_id - 1,
             )
@@ -92,7 +94,7 @@ async def post_datetime(
             await state.set_state(States.post)
     except ValueError:
         await bot.edit_message_text(
-            text=scheduled_post(cache=cache),
+            text=await scheduled_post(scheduled_posts=scheduled_posts),
             chat_id=message.chat.id,
             message_id=message.message_id - 1,
         )
@@ -114,8 +116,8 @@ async def post(
     state: FSMContext,
     bot: Bot,
     repo: RequestsRepo,
-    scheduler: AsyncIOScheduler,
-    cache: LRUCache,
+    outbox: Outbox,
+    scheduled_posts: ScheduledPosts,
 ) -> None:
     """
     Handler admin input for setting the post message, scheduling.
@@ -124,6 +126,8 @@ async def post(
     :param state: The FSMContext to manage the conversation state.
     :param bot: The bot object used to interact with the Telegram API.
     :param repo: The repository for database requests.
+    :param outbox: The outbox the post is queued in.
+    :param scheduled_posts: The scheduled posts.
     """
     data: Dict[str, Any] = await state.get_data()
     if not message.text:
@@ -136,9 +140,17 @@ async def post(
                 chat_id=message.chat.id, message_id=message.message_id - id
             )
     elif data["datetime"] is None:
-        await send_post(message=message, bot=bot, text=message.text, repo=repo)
+        audience: int = await send_post(
+            chat_id=message.chat.id,
+            category=get_category(message.chat.title),
+            text=message.text,
+            repo=repo,
+            outbox=outbox,
+        )
         await message.answer(
-            text=f"{message.text}\n\n" f"<b>Сповіщення надіслано ✅</b>\n",
+            text=f"{message.text}\n\n"
+            f"<b>Розсилку розпочато ⏳</b>\n"
+            f"Отримувачів - {audience}",
         )
         await state.clear()
         for id in range(0, 2):
@@ -152,25 +164,27 @@ async def post(
 
         job_id: str = f"{message.from_user.id}{message.date.timestamp()}"
         unique_id: str = f"{message.chat.title.split('/')[1]} - {data['time']}\n"
-        scheduler.add_job(
-            func=send_post,
-            args=(message, bot, message.text, repo, scheduler, job_id, cache),
-            trigger="interval",
-            seconds=data["datetime"],
-            id=job_id,
-        )
-
-        cache[job_id] = [job_id, unique_id]
-
-        await message.answer(
+        announcement: Message = await message.answer(
             text=f"{message.text}\n\n"
             f"<b>Сповіщення заплановано ⌛\n"
             f"Відправлення через {int(days)} днів, {int(hours)} годин, {int(minutes)} хвилин\n"
             f"id: {job_id}</b>",
             reply_markup=cancel_scheduler(),
         )
+        await scheduled_posts.add(
+            job_id=job_id,
+            description=unique_id,
+            run_date=datetime.now() + timedelta(seconds=data["datetime"]),
+            func=send_scheduled_post,
+            kwargs=dict(
+                chat_id=message.chat.id,
+                message_id=announcement.message_id,
+                text=message.text,
+                category=get_category(message.chat.title),
+            ),
+        )
         await bot.pin_chat_message(
-            chat_id=message.chat.id, message_id=message.message_id + 1
+            chat_id=message.chat.id, message_id=announcement.message_id
         )
         await state.clear()
 
@@ -183,21 +197,18 @@ async def post(
 @router.callback_query(F.data == "cancel")
 async def callback_cancel_scheduler(
     callback: CallbackQuery,
-    cache: LRUCache,
-    scheduler: AsyncIOScheduler,
+    scheduled_posts: ScheduledPosts,
 ) -> None:
     """
     Handler the callback from admin who wants to cancel a scheduled notification.
 
     :param callback: The callback query from the admin.
-    :param cache: The LRUCache to store information about scheduled jobs.
-    :param scheduler: The AsyncIOScheduler to manage scheduled tasks.
+    :param scheduled_posts: The scheduled posts.
     """
     job_id: str = callback.message.text.split("id: ")[-1]
     new_text: str = callback.message.text.split("\n\n")[0]
 
-    scheduler.remove_job(job_id)
-    del cache[job_id]
+    await scheduled_posts.remove(job_id)
 
     await callback.message.unpin()
     await callback.message.edit_text(
@@ -235,17 +246,17 @@ async def callback_next_post(callback: CallbackQuery, state: FSMContext) -> None
 
 @router.callback_query(F.data == "back")
 async def callback_back_post(
-    callback: CallbackQuery, state: FSMContext, cache: LRUCache
+    callback: CallbackQuery, state: FSMContext, scheduled_posts: ScheduledPosts
 ) -> None:
     """
     Handler the callback from an admin to go back to the previous step in post creation.
 
     :param callback: The callback query from the admin.
     :param state: The FSMContext to manage the conversation state.
-    :param cache: The LRUCache to store information about scheduled jobs.
+    :param scheduled_posts: The scheduled posts.
     """
     await callback.message.edit_text(
-        text=scheduled_post(cache=cache),
+        text=await scheduled_post(scheduled_posts=scheduled_posts),
         reply_markup=cancel_post(),
     )
     await state.set_state(States.post_datetime)
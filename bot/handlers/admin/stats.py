@@ -0,0 +1,39 @@
+from typing import Dict, Final
+
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from bot.database import RequestsRepo, UserCache
+from bot.services import RateLimiter, format_statistics
+
+router: Final[Router] = Router(name=__name__)
+
+
+@router.message(Command("stats"))
+async def command_stats(
+    message: Message,
+    repo: RequestsRepo,
+    rate_limiter: RateLimiter,
+    user_cache: UserCache,
+) -> None:
+    """
+    Handler to /stats commands.
+    Responds with the user and subscription counters without building the database file,
+    together with the number of deliveries still pending in the outbox
+    and the hit ratio of the user cache of this instance.
+
+    :param message: The message from Telegram.
+    :param repo: The repository for database requests.
+    :param rate_limiter: The rate limiter whose rejected messages are reported.
+    :param user_cache: The cache of user states whose hit ratio is reported.
+    """
+    counters: Dict[str, int] = await repo.users.get_counters()
+    backlog: int = await repo.broadcasts.count_pending()
+    await message.answer(
+        text=f"{format_statistics(counters)}\n"
+        f"В черзі на доставку - {backlog}\n"
+        f"Відхилено повідомлень - {sum(rate_limiter.rejected.values())}\n"
+        f"Влучання в кеш - {user_cache.hit_ratio:.0%} "
+        f"({user_cache.hits} з {user_cache.hits + user_cache.misses})"
+    )
@@ -1,6 +1,7 @@
-from typing import List
+from typing import List, Optional
 
 from aiogram import Router
+from redis.asyncio import Redis
 
 from bot.middlewares import (
     AlbumMiddleware,
@@ -8,20 +9,25 @@ from bot.middlewares import (
     ThrottlingMiddleware,
     TopicMiddleware,
 )
+from bot.services import RateLimiter
 
 from . import from_user, start, subscription
 
 
-def get_user_routers() -> List[Router]:
+def get_user_routers(
+    rate_limiter: RateLimiter, redis: Optional[Redis] = None
+) -> List[Router]:
     """
     Get a list of routers with user filters and specific middlewares.
 
+    :param rate_limiter: The rate limiter shared by the throttled handlers.
+    :param redis: (Optional) The Redis client the middlewares share their state through.
     :return: A list of routers with user filters and middleware applied.
     """
     start.router.message.middleware(RegisterUserMiddleware())
-    start.router.message.middleware(ThrottlingMiddleware(limit=3))
-    from_user.router.message.middleware(AlbumMiddleware())
-    from_user.router.message.middleware(ThrottlingMiddleware())
+    start.router.message.middleware(ThrottlingMiddleware(rate_limiter))
+    from_user.router.message.middleware(AlbumMiddleware(redis=redis))
+    from_user.router.message.middleware(ThrottlingMiddleware(rate_limiter))
     from_user.router.message.middleware(TopicMiddleware())
 
     routers_list: List[Router] = [
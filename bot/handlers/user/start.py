@@ -5,7 +5,7 @@ from aiogram.filters import CommandStart
 
 from bot.keyboards import start
 
-flags: Final[Dict[str, str]] = {"throttling_key": "default"}
+flags: Final[Dict[str, str]] = {"throttling_key": "start"}
 
 router: Final[Router] = Router(name=__name__)
 
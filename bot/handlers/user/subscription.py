@@ -3,8 +3,9 @@ from typing import Dict, Final, List
 from aiogram import Bot, F, Router
 from aiogram.types import ChatMemberMember, Message
 
-from bot.database import RequestsRepo
+from bot.database import RequestsRepo, UserState
 from bot.keyboards import cancel_subscription, start, url_subscription
+from bot.services import Outbox, catch_up
 
 router: Final[Router] = Router(name=__name__)
 
@@ -23,12 +24,14 @@ categories_subscribed: Final[List[str]] = [
 
 
 @router.message(F.text.in_(categories_subscribe))
-async def subscribe(message: Message, repo: RequestsRepo) -> None:
+async def subscribe(message: Message, repo: RequestsRepo, outbox: Outbox) -> None:
     """
     Handler user subscription to specific categories.
+    The oldest post of the category the user missed is queued right away.
 
     :param message: The message from Telegram.
     :param repo: The repository for database requests.
+    :param outbox: The outbox the missed post is queued in.
     """
     category_mapping: Dict[str, str] = {
         "Молодіжна політика": (
@@ -61,9 +64,15 @@ async def subscribe(message: Message, repo: RequestsRepo) -> None:
 
     category: str = category_mapping.get(" ".join(message.text.split()[:-1]))
     await message.answer(text=category, reply_markup=cancel_subscription())
-    await repo.users.update_user_subscription(
+    state: UserState = await repo.users.update_user_subscription(
         category=message.text, user_id=message.from_user.id
     )
+    await catch_up(
+        user_id=state.user_id,
+        category=state.active_category,
+        repo=repo,
+        outbox=outbox,
+    )
 
 
 @router.message(F.text.in_(categories_subscribed))
@@ -97,10 +106,10 @@ async def unsubscribe(message: Message, repo: RequestsRepo) -> None:
     :param message: The message from Telegram.
     :param repo: The repository for database requests.
     """
-    await repo.users.update_user_subscription(user_id=message.from_user.id, cancel=True)
-    subscriptions: List[str] = await repo.users.get_user_subscriptions(
-        user_id=message.from_user.id
+    state: UserState = await repo.users.update_user_subscription(
+        user_id=message.from_user.id, cancel=True
     )
+    subscriptions: List[str] = repo.users.subscription_labels(state)
     await message.answer(text="Підписку скасовано", reply_markup=start(subscriptions))
 
 
@@ -133,12 +142,10 @@ async def main_menu(message: Message, repo: RequestsRepo) -> None:
     :param message: The message from Telegram.
     :param repo: The repository for database requests.
     """
-    await repo.users.update_user_subscription(
+    state: UserState = await repo.users.update_user_subscription(
         user_id=message.from_user.id, main_menu=True
     )
-    subscriptions: List[str] = await repo.users.get_user_subscriptions(
-        user_id=message.from_user.id
-    )
+    subscriptions: List[str] = repo.users.subscription_labels(state)
     await message.answer(
         text="Ви повернулись до головного меню", reply_markup=start(subscriptions)
     )
@@ -1,6 +1,7 @@
 from .album import AlbumMiddleware
 from .config import ConfigMiddleware
 from .database import DatabaseMiddleware
+from .outbox import OutboxMiddleware
 from .register_user import RegisterUserMiddleware
 from .scheduler import SchedulerMiddleware
 from .throttling import ThrottlingMiddleware
@@ -16,4 +17,5 @@ __all__: list[str] = [
     "AlbumMiddleware",
     "ThrottlingMiddleware",
     "SchedulerMiddleware",
+    "OutboxMiddleware",
 ]
@@ -1,28 +1,175 @@
 import asyncio
-from typing import Any, Awaitable, Callable, Dict, List, Union
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type, Union
 
-from aiogram import BaseMiddleware, html
-from aiogram.types import CallbackQuery, InputMedia, InputMediaPhoto, Message
+from aiogram import BaseMiddleware, Bot, html
+from aiogram.types import (
+    CallbackQuery,
+    InputMedia,
+    InputMediaAudio,
+    InputMediaDocument,
+    InputMediaPhoto,
+    InputMediaVideo,
+    Message,
+)
+from redis.asyncio import Redis
 
 from bot.config import Config
 
+MAX_ALBUM_SIZE: int = 10
+
+MEDIA_TYPES: Dict[str, Type[InputMedia]] = {
+    "video": InputMediaVideo,
+    "document": InputMediaDocument,
+    "audio": InputMediaAudio,
+}
+
+
+@dataclass
+class PendingAlbum:
+    """
+    The parts of an album received so far.
+
+    Attributes:
+        messages (List[Message]): The parts of the album.
+        updated (float): The monotonic time the last part arrived at.
+        full (asyncio.Event): Set once the album reaches the maximum size.
+    """
+
+    messages: List[Message] = field(default_factory=list)
+    updated: float = field(default_factory=time.monotonic)
+    full: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def add(self, message: Message) -> None:
+        """
+        Adds a part of the album and restarts the quiet period.
+
+        :param message: The part of the album.
+        """
+        self.messages.append(message)
+        self.updated = time.monotonic()
+        if len(self.messages) >= MAX_ALBUM_SIZE:
+            self.full.set()
+
 
 class AlbumMiddleware(BaseMiddleware):
-    album_data: dict = {}
+    """
+    Collects the parts of a media group into one album.
 
-    def __init__(self, latency: Union[int, float] = 0.01):
+    The first part of a group waits until no new part has arrived for ``latency``
+    seconds or the group reaches ten items, then calls the handler with the whole
+    album; the other parts are dropped. Groups are keyed by (chat, media_group_id)
+    and kept per middleware instance; groups older than ``ttl`` are evicted.
+
+    :param latency: The quiet period in seconds after which an album is complete.
+    :param redis: (Optional) The Redis client the parts are collected in,
+                  so the parts may arrive at different instances of the bot.
+    :param ttl: The number of seconds after which an unfinished album is evicted.
+    :param max_albums: The maximum number of albums collected at the same time.
+    """
+
+    def __init__(
+        self,
+        latency: Union[int, float] = 0.3,
+        redis: Optional[Redis] = None,
+        ttl: int = 60,
+        max_albums: int = 1000,
+    ):
         self.latency = latency
+        self.redis = redis
+        self.ttl = ttl
+        self.max_albums = max_albums
+        self.albums: Dict[Tuple[int, str], PendingAlbum] = {}
+
+    def evict(self) -> None:
+        """
+        Drops the albums whose last part arrived more than ttl seconds ago and,
+        if there are still too many, the oldest ones.
+        """
+        deadline: float = time.monotonic() - self.ttl
+        stale: List[Tuple[int, str]] = [
+            key for key, album in self.albums.items() if album.updated < deadline
+        ]
+        for key in stale:
+            del self.albums[key]
+        while len(self.albums) >= self.max_albums:
+            del self.albums[next(iter(self.albums))]
+
+    async def collect(self, event: Message) -> Optional[List[Message]]:
+        """
+        Collects the parts of an album in memory.
+
+        :param event: The part of the album.
+        :return: The parts of the album for the first part, None for the others.
+        """
+        key: Tuple[int, str] = (event.chat.id, event.media_group_id)
+        if album := self.albums.get(key):
+            album.add(event)
+            return None
+
+        self.evict()
+        album = self.albums[key] = PendingAlbum()
+        album.add(event)
+        try:
+            while (quiet := time.monotonic() - album.updated) < self.latency:
+                try:
+                    await asyncio.wait_for(
+                        album.full.wait(), timeout=self.latency - quiet
+                    )
+                    break
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self.albums.pop(key, None)
+        return album.messages
+
+    async def collect_shared(self, event: Message, bot: Bot) -> Optional[List[Message]]:
+        """
+        Collects the parts of an album in a Redis list shared between instances.
+
+        :param event: The part of the album.
+        :param bot: The bot object the restored messages are bound to.
+        :return: The parts of the album for the first part, None for the others.
+        """
+        key: str = f"album:{event.chat.id}:{event.media_group_id}"
+        async with self.redis.pipeline(transaction=True) as pipeline:
+            pipeline.rpush(key, event.model_dump_json(exclude_none=True))
+            pipeline.set(f"{key}:updated", time.time(), ex=self.ttl)
+            pipeline.expire(key, self.ttl)
+            size, _, _ = await pipeline.execute()
+        if size > 1:
+            return None
+
+        started: float = time.time()
+        while time.time() - started < self.ttl:
+            async with self.redis.pipeline(transaction=False) as pipeline:
+                pipeline.llen(key)
+                pipeline.get(f"{key}:updated")
+                size, updated = await pipeline.execute()
+            quiet: float = time.time() - float(updated or 0)
+            if size >= MAX_ALBUM_SIZE or quiet >= self.latency:
+                break
+            await asyncio.sleep(self.latency - quiet)
+
+        async with self.redis.pipeline(transaction=True) as pipeline:
+            pipeline.lrange(key, 0, -1)
+            pipeline.delete(key, f"{key}:updated")
+            messages, _ = await pipeline.execute()
+        return [Message.model_validate_json(message).as_(bot) for message in messages]
 
     @staticmethod
     def get_album(album: List[Message], category: str) -> List[InputMedia]:
         """
         Creates a list of media elements suitable for creating an album.
+        The parts are ordered by message ID, because they may arrive out of order.
 
         :param album: A list of Message objects representing the album content.
         :param category: A category string for captions.
         :return: List of InputMedia objects for constructing a media album.
         """
         media_group: List[InputMedia] = []
+        album = sorted(album, key=lambda message: message.message_id)
 
         for message in album:
             caption = (
@@ -37,9 +184,11 @@ class AlbumMiddleware(BaseMiddleware):
                     break
                 media_group.append(InputMediaPhoto(media=file_id))
             else:
-                obj_dict: Dict[str, Any] = message.model_dump()
-                file_id: str = obj_dict[message.content_type]["file_id"]
-                media_group.append(InputMedia(media=file_id, caption=caption))
+                file_id: str = getattr(message, message.content_type).file_id
+                media_type: Type[InputMedia] = MEDIA_TYPES.get(
+                    message.content_type, InputMediaDocument
+                )
+                media_group.append(media_type(media=file_id, caption=caption))
 
         return media_group
 
@@ -52,28 +201,19 @@ class AlbumMiddleware(BaseMiddleware):
         config: Config = data["config"]
 
         if not event.media_group_id:
-            await handler(event, data)
-            return
-        try:
-            self.album_data[event.media_group_id].append(event)
-        except KeyError:
-            self.album_data[event.media_group_id] = [event]
-            await asyncio.sleep(self.latency)
+            return await handler(event, data)
 
-            data["_is_last"] = True
-
-            if event.chat.id in config.tg_bot.all_groups:
-                data["album"] = self.get_album(
-                    album=self.album_data[event.media_group_id],
-                    category=f"{html.bold(html.italic(event.chat.title.split('/')[1]))}: {event.caption}",
-                )
-            else:
-                data["album"] = self.get_album(
-                    album=self.album_data[event.media_group_id], category=event.caption
-                )
-
-            await handler(event, data)
+        album: Optional[List[Message]] = (
+            await self.collect_shared(event, data["bot"])
+            if self.redis is not None
+            else await self.collect(event)
+        )
+        if album is None:
+            return
 
-        if event.media_group_id and data.get("_is_last"):
-            del self.album_data[event.media_group_id]
-            del data["_is_last"]
+        category: str = event.caption
+        if event.chat.id in config.tg_bot.all_groups:
+            label: str = html.bold(html.italic(event.chat.title.split("/")[1]))
+            category = f"{label}: {event.caption}"
+        data["album"] = self.get_album(album=album, category=category)
+        return await handler(event, data)
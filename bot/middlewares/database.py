@@ -1,16 +1,33 @@
-from typing import Any, Awaitable, Callable, Dict
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from bot.database import RequestsRepo
+from bot.database import AudienceIndex, CacheSync, RequestsRepo, TopicIndex, UserCache
 
 
 class DatabaseMiddleware(BaseMiddleware):
-    def __init__(self, session_pool: async_sessionmaker) -> None:
+    """
+    Provides a repository for every update and owns its transaction: it is
+    committed once after the handler succeeds and rolled back if the handler fails.
+    The session is only taken from the pool when a handler first uses the database.
+    """
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker,
+        user_cache: UserCache,
+        topic_index: TopicIndex,
+        audience_index: AudienceIndex,
+        cache_sync: Optional[CacheSync] = None,
+    ) -> None:
         super().__init__()
         self.session_pool = session_pool
+        self.user_cache = user_cache
+        self.topic_index = topic_index
+        self.audience_index = audience_index
+        self.cache_sync = cache_sync
 
     async def __call__(
         self,
@@ -18,7 +35,20 @@ class DatabaseMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: Dict[str, Any],
     ) -> Any:
-        session: AsyncSession
-        async with self.session_pool() as session:
-            data["repo"] = RequestsRepo(session)
-            return await handler(event, data)
+        repo: RequestsRepo
+        async with RequestsRepo(
+            session_pool=self.session_pool,
+            user_cache=self.user_cache,
+            topic_index=self.topic_index,
+            audience_index=self.audience_index,
+            cache_sync=self.cache_sync,
+        ) as repo:
+            data["repo"] = repo
+            data["session_pool"] = self.session_pool
+            try:
+                result: Any = await handler(event, data)
+            except Exception:
+                await repo.rollback()
+                raise
+            await repo.commit()
+            return result
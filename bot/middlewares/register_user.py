@@ -1,9 +1,9 @@
-from typing import Any, Awaitable, Callable, Dict, List
+from typing import Any, Awaitable, Callable, Dict
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message, user
 
-from bot.database import RequestsRepo
+from bot.database import RequestsRepo, UserState
 
 
 class RegisterUserMiddleware(BaseMiddleware):
@@ -16,16 +16,12 @@ class RegisterUserMiddleware(BaseMiddleware):
         tg_user: user.User = data.get("event_from_user")
         repo: RequestsRepo = data["repo"]
 
-        if not await repo.users.get_user(user_id=tg_user.id):
-            await repo.users.add_user(
-                user_id=tg_user.id,
-                first_name=tg_user.first_name,
-                last_name=tg_user.last_name,
-                username=tg_user.username,
-            )
-        subscriptions: List[str] = await repo.users.get_user_subscriptions(
-            user_id=tg_user.id
+        state: UserState = await repo.users.add_user(
+            user_id=tg_user.id,
+            first_name=tg_user.first_name,
+            last_name=tg_user.last_name,
+            username=tg_user.username,
         )
-        data["subscriptions"] = subscriptions
+        data["subscriptions"] = repo.users.subscription_labels(state)
 
         return await handler(event, data)
@@ -3,14 +3,17 @@ from typing import Any, Awaitable, Callable, Dict
 from aiogram import BaseMiddleware
 from aiogram.types import Message
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from cachetools import LRUCache
+
+from bot.services import ScheduledPosts
 
 
 class SchedulerMiddleware(BaseMiddleware):
-    def __init__(self, scheduler: AsyncIOScheduler) -> None:
+    def __init__(
+        self, scheduler: AsyncIOScheduler, scheduled_posts: ScheduledPosts
+    ) -> None:
         super().__init__()
         self.scheduler = scheduler
-        self.cache = LRUCache(maxsize=20)
+        self.scheduled_posts = scheduled_posts
 
     async def __call__(
         self,
@@ -19,5 +22,5 @@ class SchedulerMiddleware(BaseMiddleware):
         data: Dict[str, Any],
     ) -> Any:
         data["scheduler"] = self.scheduler
-        data["cache"] = self.cache
+        data["scheduled_posts"] = self.scheduled_posts
         return await handler(event, data)
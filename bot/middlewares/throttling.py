@@ -1,14 +1,15 @@
-from typing import Any, Awaitable, Callable, Dict, Union
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 from aiogram import BaseMiddleware
 from aiogram.dispatcher.flags import get_flag
 from aiogram.types import Message
-from cachetools import TTLCache
+
+from bot.services import RateLimiter
 
 
 class ThrottlingMiddleware(BaseMiddleware):
-    def __init__(self, limit: Union[int, float] = 0.5) -> None:
-        self.cache: Dict[str, TTLCache] = {"default": TTLCache(maxsize=100, ttl=limit)}
+    def __init__(self, rate_limiter: RateLimiter) -> None:
+        self.rate_limiter = rate_limiter
 
     async def __call__(
         self,
@@ -16,10 +17,9 @@ class ThrottlingMiddleware(BaseMiddleware):
         event: Message,
         data: Dict[str, Any],
     ) -> Any:
-        throttling_key = get_flag(data, "throttling_key")
-        if throttling_key is not None and throttling_key in self.cache:
-            if event.chat.id in self.cache[throttling_key]:
-                return
-            else:
-                self.cache[throttling_key][event.chat.id] = None
+        throttling_key: Optional[str] = get_flag(data, "throttling_key")
+        if throttling_key is not None and not await self.rate_limiter.acquire(
+            throttling_key=throttling_key, chat_id=event.chat.id
+        ):
+            return
         return await handler(event, data)
@@ -1,23 +1,24 @@
-from typing import Any, Awaitable, Callable, Dict, List, Union
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 from aiogram import BaseMiddleware, Bot
 from aiogram.types import ForumTopic, Message, user
 from aiogram.utils.markdown import hlink
 
 from bot.config import Config
-from bot.database import RequestsRepo, User
+from bot.database import RequestsRepo, UserState
 from bot.keyboards import cancel_subscription, start
 
 
 class TopicMiddleware(BaseMiddleware):
     @staticmethod
     async def create_topic(
-        chat_id: str, bot: Bot, message: Message, repo: RequestsRepo
+        chat_id: str, category: str, bot: Bot, message: Message, repo: RequestsRepo
     ) -> None:
         """
         Create a new forum topic and associated chat for a user.
 
         :param chat_id: The chat ID where the topic and chat will be created.
+        :param category: The category the topic is created for.
         :param bot: The bot object used to interact with the Telegram API.
         :param message: The message from Telegram.
         :param repo: The repository for database requests.
@@ -41,7 +42,10 @@ class TopicMiddleware(BaseMiddleware):
             chat_id=chat_id, message_thread_id=topic_id.message_thread_id
         )
         await repo.users.add_topic_id(
-            user_id=message.from_user.id, topic_id=topic_id.message_thread_id
+            user_id=message.from_user.id,
+            category=category,
+            chat_id=int(chat_id),
+            topic_id=topic_id.message_thread_id,
         )
 
     async def __call__(
@@ -54,9 +58,13 @@ class TopicMiddleware(BaseMiddleware):
         repo: RequestsRepo = data["repo"]
         config: Config = data["config"]
 
-        user_object: User = await repo.users.get_user(user_id=tg_user.id)
-        active_category: Union[str, None] = user_object.active_category
-        user_topic: str = f"{active_category}_topic"
+        state: UserState = await repo.users.get_user_state(user_id=tg_user.id)
+        active_category: Optional[str] = state.active_category
+        topic_id: Optional[int] = (
+            await repo.users.get_topic_id(user_id=tg_user.id, category=active_category)
+            if active_category
+            else None
+        )
 
         if active_category == "civic_education":
             await event.answer(
@@ -74,14 +82,18 @@ class TopicMiddleware(BaseMiddleware):
             )
             return
 
-        elif hasattr(user_object, user_topic) and not getattr(user_object, user_topic):
-            chat_id: str = getattr(config.tg_bot, user_object.active_category)
+        elif not topic_id:
+            chat_id: str = getattr(config.tg_bot, active_category)
             await self.create_topic(
-                chat_id=chat_id, bot=data["bot"], message=event, repo=repo
+                chat_id=chat_id,
+                category=active_category,
+                bot=data["bot"],
+                message=event,
+                repo=repo,
             )
             return
 
         else:
             data["chat_id"] = getattr(config.tg_bot, active_category)
-            data["topic_id"] = getattr(user_object, user_topic)
+            data["topic_id"] = topic_id
             return await handler(event, data)
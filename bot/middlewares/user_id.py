@@ -1,16 +1,12 @@
-from typing import Any, Awaitable, Callable, Dict
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 from aiogram import BaseMiddleware
 from aiogram.types import Message
-from cachetools import LRUCache
 
 from bot.database import RequestsRepo
 
 
 class UserIdMiddleware(BaseMiddleware):
-    def __init__(self) -> None:
-        self.cache = LRUCache(maxsize=10)
-
     async def __call__(
         self,
         handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
@@ -34,15 +30,9 @@ class UserIdMiddleware(BaseMiddleware):
             },
         }
 
-        key: str = f"{event.chat.id}_{event.message_thread_id}"
-        user_id: int = self.cache.get(key)
-
-        if not user_id:
-            user_id: int = await repo.users.get_user_id_by_topic(
-                topic_id=event.message_thread_id,
-                category=categories.get(event.chat.title)["id"],
-            )
-            self.cache[key] = user_id
+        user_id: Optional[int] = await repo.users.get_user_id_by_topic(
+            chat_id=event.chat.id, topic_id=event.message_thread_id
+        )
 
         data["user_id"] = user_id
         data["category"] = categories.get(event.chat.title)["label"]
@@ -1,7 +1,17 @@
-from .send_post import send_post
+from .send_post import (
+    PostContext,
+    get_category,
+    send_post,
+    send_scheduled_post,
+    setup_post_context,
+)
 from .states import States
 
 __all__: list[str] = [
     "States",
     "send_post",
+    "send_scheduled_post",
+    "get_category",
+    "PostContext",
+    "setup_post_context",
 ]
@@ -1,93 +1,155 @@
-import asyncio
-import json
 import uuid
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass
+from typing import Dict, Final, Optional
 
-import aiofiles
-from aiogram import Bot, html, types
-from aiogram.exceptions import TelegramForbiddenError
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from cachetools import LRUCache
+from aiogram import Bot, html
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from bot.database import RequestsRepo
+from bot.database import AudienceIndex, RequestsRepo
+from bot.services import Outbox
+
+categories: Final[Dict[str, Dict[str, str]]] = {
+    "Особистість / Молодіжна політика": {
+        "category": "youth_policy",
+        "label": "Молодіжна політика 📚",
+    },
+    "Особистість / Підтримка психолога": {
+        "category": "psychologist_support",
+        "label": "Підтримка психолога 🧘",
+    },
+    "Особистість / Громадянська освіта": {
+        "category": "civic_education",
+        "label": "Громадянська освіта 🏛",
+    },
+    "Особистість / Юридична підтримка": {
+        "category": "legal_support",
+        "label": "Юридична підтримка ⚖️",
+    },
+}
+
+
+@dataclass
+class PostContext:
+    """
+    The long-lived objects scheduled posts need when they fire.
+    Scheduled jobs only store serializable arguments, so these are set up once
+    at startup with setup_post_context().
+
+    Attributes:
+        bot (Bot): The bot object used to interact with the Telegram API.
+        session_pool (async_sessionmaker): The pool the job takes a session from.
+        outbox (Outbox): The outbox the post is queued in.
+        audience_index (Optional[AudienceIndex]): The index of category subscribers.
+        redis (Optional[Redis]): The Redis client shared by all instances.
+    """
+
+    bot: Bot
+    session_pool: async_sessionmaker
+    outbox: Outbox
+    audience_index: Optional[AudienceIndex] = None
+    redis: Optional[Redis] = None
+
+
+post_context: Optional[PostContext] = None
+
+
+def setup_post_context(context: PostContext) -> None:
+    """
+    Sets up the objects scheduled posts use when they fire.
+
+    :param context: The objects shared with scheduled posts.
+    """
+    global post_context
+    post_context = context
+
+
+def get_category(chat_title: str) -> str:
+    """
+    Returns the category of an admin chat.
+
+    :param chat_title: The title of the admin chat.
+    :return: The name of the category, e.g. "youth_policy".
+    """
+    return categories[chat_title]["category"]
 
 
 async def send_post(
-    message: types.Message,
-    bot: Bot,
+    chat_id: int,
+    category: str,
     text: str,
     repo: RequestsRepo,
-    scheduler: Optional[AsyncIOScheduler] = None,
-    job_id: Optional[str] = None,
-    cache: Optional[LRUCache] = None,
-) -> None:
+    outbox: Outbox,
+) -> int:
     """
     Send posts to a list of users based on their preferences.
+    The post is written to the outbox and delivered in the background.
 
-    :param message: The message from Telegram.
-    :param bot: The bot object used to interact with the Telegram API.
+    :param chat_id: The ID of the admin chat the delivery report is sent to.
+    :param category: The category of the post, e.g. "youth_policy".
     :param text: The text content of the post to be sent.
     :param repo: The repository for database requests.
-    :param scheduler: (Optional) An asynchronous scheduler for scheduling posts.
-                      Defaults to None.
-    :param: job_id: (Optional) Identifier for the scheduled job.
-                    Defaults to None.
-    :param: cache: (Optional) LRUCache for caching data to improve performance.
-                   Defaults to None.
+    :param outbox: The outbox the post is queued in.
+    :return: The number of subscribers the post is sent to.
     """
-    category_mapping: Dict[str, Dict[str, Any]] = {
-        "Особистість / Молодіжна політика": {
-            "category": 4,
-            "label": "Молодіжна політика 📚",
-        },
-        "Особистість / Підтримка психолога": {
-            "category": 5,
-            "label": "Підтримка психолога 🧘",
-        },
-        "Особистість / Громадянська освіта": {
-            "category": 6,
-            "label": "Громадянська освіта 🏛",
-        },
-        "Особистість / Юридична підтримка": {
-            "category": 7,
-            "label": "Юридична підтримка ⚖️",
-        },
+    labels: Dict[str, str] = {
+        value["category"]: value["label"] for value in categories.values()
     }
-    data: List[tuple] = await repo.users.get_all_users()
-    file_path: Path = Path("/root/Personality/data/data.json")
-    category: int = category_mapping.get(message.chat.title)["category"]
-    label: str = html.bold(
-        html.italic(category_mapping.get(message.chat.title)["label"])
-    )
+    label: str = html.bold(html.italic(labels[category]))
     post_id: str = str(uuid.uuid4())
 
-    for user in data:
-        try:
-            if user[category]:
-                await bot.send_message(chat_id=user[0], text=f"{label}: {text}")
-                await repo.posts.add_post(user_id=user[0], post_id=post_id)
-                await asyncio.sleep(0.05)
-        except TelegramForbiddenError:
-            continue
+    await repo.post_contents.add_post_content(
+        post_id=post_id, category=category, text=text
+    )
+    await repo.broadcasts.add_job(
+        text=f"{label}: {text}",
+        category=category,
+        post_id=post_id,
+        chat_id=chat_id,
+    )
+    await repo.commit()
+    outbox.notify()
+    return await repo.users.count_audience(category)
 
-    async with aiofiles.open(file_path, "r", encoding="utf-8") as json_file:
-        post_mapping = json.loads(await json_file.read())
 
-    post_mapping[post_id] = {"text": text, "category": category}
+async def send_scheduled_post(
+    chat_id: int, message_id: int, text: str, category: str
+) -> None:
+    """
+    Send a scheduled post. Runs from the persistent job store,
+    so it takes its own session from the pool.
 
-    async with aiofiles.open(file_path, "w", encoding="utf-8") as json_file:
-        await json_file.write(json.dumps(post_mapping, ensure_ascii=False, indent=4))
+    Every instance of the bot fires the jobs of the shared job store, so with
+    Redis the post is claimed first and only the instance that claims it sends it.
 
-    if scheduler:
-        await bot.unpin_chat_message(
-            chat_id=message.chat.id, message_id=message.message_id + 1
-        )
-        await bot.edit_message_text(
-            text=f"{text}\n\n" f"<b>Сповіщення надіслано ✅</b>\n",
-            chat_id=message.chat.id,
-            message_id=message.message_id + 1,
+    :param chat_id: The ID of the admin chat the post was scheduled in.
+    :param message_id: The ID of the pinned message announcing the post.
+    :param text: The text content of the post to be sent.
+    :param category: The category of the post, e.g. "youth_policy".
+    """
+    context: PostContext = post_context
+    if context.redis is not None and not await context.redis.set(
+        f"scheduled_post:{chat_id}:{message_id}", 1, nx=True, ex=86400
+    ):
+        return
+
+    repo: RequestsRepo
+    async with RequestsRepo(
+        session_pool=context.session_pool, audience_index=context.audience_index
+    ) as repo:
+        audience: int = await send_post(
+            chat_id=chat_id,
+            category=category,
+            text=text,
+            repo=repo,
+            outbox=context.outbox,
         )
 
-        scheduler.remove_job(job_id=job_id)
-        del cache[job_id]
+    await context.bot.unpin_chat_message(chat_id=chat_id, message_id=message_id)
+    await context.bot.edit_message_text(
+        text=f"{text}\n\n"
+        f"<b>Розсилку розпочато ⏳</b>\n"
+        f"Отримувачів - {audience}",
+        chat_id=chat_id,
+        message_id=message_id,
+    )
@@ -1,5 +1,22 @@
-from .schedule_post import schedule_post
+from .broadcaster import BroadcastStats, Broadcaster, Delivery
+from .export_users import export_users
+from .outbox import Outbox
+from .rate_limiter import RateLimit, RateLimiter
+from .schedule_post import catch_up, format_post, schedule_post
+from .scheduled_posts import ScheduledPosts
+from .statistics import format_statistics
 
 __all__: list[str] = [
+    "Broadcaster",
+    "BroadcastStats",
+    "Delivery",
+    "RateLimit",
+    "RateLimiter",
+    "Outbox",
     "schedule_post",
+    "catch_up",
+    "format_post",
+    "ScheduledPosts",
+    "export_users",
+    "format_statistics",
 ]
@@ -0,0 +1,302 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class Delivery(NamedTuple):
+    """
+    A single message addressed to a single chat.
+
+    Attributes:
+        chat_id (int): The Telegram chat ID of the recipient.
+        text (str): The text of the message.
+        post_id (Optional[str]): The unique ID of the post, if the message belongs to one.
+    """
+
+    chat_id: int
+    text: str
+    post_id: Optional[str] = None
+
+
+@dataclass
+class BroadcastStats:
+    """
+    Summary of a finished broadcast.
+
+    Attributes:
+        sent (int): The number of delivered messages.
+        failed (int): The number of messages Telegram refused to deliver.
+        retried (int): The number of messages resent after a flood-control wait.
+        unreachable (List[int]): The chat IDs of users who blocked the bot.
+        started (float): The monotonic time the broadcast started at.
+        finished (Optional[float]): The monotonic time the broadcast finished at.
+    """
+
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    unreachable: List[int] = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+    finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        """
+        The number of seconds the broadcast took (or has taken so far).
+        """
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rate(self) -> float:
+        """
+        The number of delivered messages per second.
+        """
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"sent={self.sent} failed={self.failed} retried={self.retried} "
+            f"unreachable={len(self.unreachable)} "
+            f"elapsed={self.elapsed:.1f}s rate={self.rate:.1f}/s"
+        )
+
+
+class TokenBucket:
+    """
+    A token bucket limiting the global rate of outgoing Telegram requests.
+
+    :param rate: The number of tokens added per second.
+    :param capacity: The maximum number of tokens the bucket can hold (burst size).
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens: float = capacity
+        self._updated: float = time.monotonic()
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    async def _wait(self) -> None:
+        """
+        Hook for subclasses to hold back all waiters before a token is taken.
+        """
+
+    async def acquire(self) -> None:
+        """
+        Waits until a token is available and takes it.
+        Waiters are served in the order they arrived.
+        """
+        async with self._lock:
+            await self._wait()
+            while True:
+                now: float = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    A token bucket whose rate follows Telegram's flood control (AIMD).
+
+    When Telegram answers with a flood-wait, every sender is paused for
+    ``retry_after`` seconds and the rate is cut multiplicatively. After that,
+    each second without a flood-wait raises the rate by a fixed step until it
+    reaches the maximum again.
+
+    :param max_rate: The highest rate the limiter ramps up to.
+    :param min_rate: The lowest rate the limiter backs off to.
+    :param increase: The number of messages per second added after each calm second.
+    :param decrease: The factor the rate is multiplied by on a flood-wait.
+    """
+
+    def __init__(
+        self,
+        max_rate: float,
+        min_rate: float = 1,
+        increase: float = 1,
+        decrease: float = 0.5,
+    ) -> None:
+        super().__init__(rate=max_rate, capacity=int(max_rate))
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self._paused_until: float = 0.0
+        self._increased: float = time.monotonic()
+
+    async def _wait(self) -> None:
+        while (delay := self._paused_until - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self) -> None:
+        """
+        Registers a delivered message and raises the rate additively
+        once per calm second.
+        """
+        now: float = time.monotonic()
+        if self.rate < self.max_rate and now - self._increased >= 1:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self._increased = now
+
+    def on_retry_after(self, retry_after: float) -> None:
+        """
+        Pauses all senders and cuts the rate multiplicatively.
+        Flood-waits reported by requests that were already in flight during
+        the pause do not cut the rate again.
+
+        :param retry_after: The number of seconds Telegram asked to wait.
+        """
+        now: float = time.monotonic()
+        if now >= self._paused_until:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            logger.warning(
+                "Flood control exceeded, pausing for %ss, rate lowered to %.1f/s",
+                retry_after,
+                self.rate,
+            )
+        self._paused_until = max(self._paused_until, now + retry_after)
+        self._increased = self._paused_until
+        self._tokens = 0
+        self._updated = self._paused_until
+
+
+async def _aiter(
+    deliveries: Union[Iterable[Delivery], AsyncIterable[Delivery]]
+) -> AsyncIterator[Delivery]:
+    """
+    Iterates over both synchronous and asynchronous iterables of deliveries.
+    """
+    if isinstance(deliveries, AsyncIterable):
+        async for delivery in deliveries:
+            yield delivery
+    else:
+        for delivery in deliveries:
+            yield delivery
+
+
+class Broadcaster:
+    """
+    Sends messages to many chats at once with a bounded pool of concurrent senders.
+    All senders share one adaptive rate limiter, so the bot stays within Telegram's
+    global limit of about 30 messages per second no matter how many broadcasts
+    are running, and backs off together when flood control kicks in.
+
+    :param bot: The bot object used to interact with the Telegram API.
+    :param rate: The maximum number of messages sent per second.
+    :param workers: The number of concurrent senders per broadcast.
+    :param attempts: The number of times a message is sent before it is counted as failed.
+    """
+
+    def __init__(
+        self, bot: Bot, rate: float = 30, workers: int = 20, attempts: int = 5
+    ) -> None:
+        self.bot = bot
+        self.workers = workers
+        self.attempts = attempts
+        self.limiter: AdaptiveRateLimiter = AdaptiveRateLimiter(max_rate=rate)
+
+    async def send(self, delivery: Delivery, stats: BroadcastStats) -> bool:
+        """
+        Sends a single message, waiting out flood control if needed.
+
+        :param delivery: The message to send.
+        :param stats: The statistics of the current broadcast.
+        :return: True if the message was delivered, False otherwise.
+        """
+        for attempt in range(self.attempts):
+            await self.limiter.acquire()
+            try:
+                await self.bot.send_message(
+                    chat_id=delivery.chat_id, text=delivery.text
+                )
+            except TelegramRetryAfter as exception:
+                self.limiter.on_retry_after(exception.retry_after)
+                if attempt + 1 < self.attempts:
+                    stats.retried += 1
+                continue
+            except TelegramForbiddenError:
+                stats.unreachable.append(delivery.chat_id)
+                break
+            except TelegramBadRequest:
+                break
+            self.limiter.on_success()
+            stats.sent += 1
+            return True
+        stats.failed += 1
+        return False
+
+    async def broadcast(
+        self,
+        deliveries: Union[Iterable[Delivery], AsyncIterable[Delivery]],
+        on_sent: Optional[Callable[[Delivery], Awaitable[None]]] = None,
+    ) -> BroadcastStats:
+        """
+        Sends every delivery and waits until all of them are processed.
+
+        The deliveries iterable and the on_sent callback are never awaited
+        concurrently, so both of them may safely share one database session.
+
+        :param deliveries: The messages to send.
+        :param on_sent: (Optional) A coroutine function called after each delivered message.
+        :return: The statistics of the finished broadcast.
+        """
+        stats: BroadcastStats = BroadcastStats()
+        queue: asyncio.Queue[Optional[Delivery]] = asyncio.Queue(
+            maxsize=self.workers * 2
+        )
+        lock: asyncio.Lock = asyncio.Lock()
+
+        async def produce() -> None:
+            iterator: AsyncIterator[Delivery] = _aiter(deliveries)
+            while True:
+                async with lock:
+                    delivery: Optional[Delivery] = await anext(iterator, None)
+                if delivery is None:
+                    break
+                await queue.put(delivery)
+            for _ in range(self.workers):
+                await queue.put(None)
+
+        async def consume() -> None:
+            while (delivery := await queue.get()) is not None:
+                if not await self.send(delivery=delivery, stats=stats):
+                    continue
+                if on_sent:
+                    async with lock:
+                        await on_sent(delivery)
+
+        async with asyncio.TaskGroup() as task_group:
+            task_group.create_task(produce())
+            for _ in range(self.workers):
+                task_group.create_task(consume())
+
+        stats.finished = time.monotonic()
+        logger.info("Broadcast finished: %s", stats)
+        return stats
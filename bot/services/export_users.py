@@ -0,0 +1,67 @@
+import csv
+import io
+import logging
+import zipfile
+from typing import Dict, List
+
+from aiogram import Bot
+from aiogram.types import BufferedInputFile
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.database import RequestsRepo
+from bot.services.statistics import format_statistics
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+async def export_users(
+    bot: Bot, chat_id: int, session_maker: async_sessionmaker
+) -> None:
+    """
+    Generates a database report and sends it to the chat.
+    Users are streamed from a server-side cursor straight into a zip-compressed
+    CSV in memory, and the summary comes from the subscription counters.
+
+    :param bot: The bot object used to interact with the Telegram API.
+    :param chat_id: The chat ID the report is sent to.
+    :param session_maker: The asynchronous session maker for database interaction.
+    """
+    session: AsyncSession
+    headers: List[str] = [
+        "ID",
+        "Ім'я",
+        "Прізвище",
+        "Ім'я користувача",
+        "Молодіжна політика",
+        "Психологічна підтримка",
+        "Громадянська освіта",
+        "Юридична підтримка",
+    ]
+    buffer: io.BytesIO = io.BytesIO()
+
+    try:
+        async with session_maker() as session:
+            repo: RequestsRepo = RequestsRepo(session)
+            counters: Dict[str, int] = await repo.users.get_counters()
+
+            with zipfile.ZipFile(
+                buffer, mode="w", compression=zipfile.ZIP_DEFLATED
+            ) as archive, io.TextIOWrapper(
+                archive.open("users.csv", mode="w"), encoding="utf-8", newline=""
+            ) as file:
+                writer = csv.writer(file)
+                writer.writerow(headers)
+                async for row_data in repo.users.iter_users():
+                    writer.writerow(row_data)
+    except Exception:
+        logger.exception("Failed to export users")
+        await bot.send_message(
+            chat_id=chat_id, text="Не вдалося сформувати базу даних ❌"
+        )
+        return
+
+    await bot.send_document(
+        chat_id=chat_id,
+        document=BufferedInputFile(file=buffer.getvalue(), filename="users.zip"),
+        caption=format_statistics(counters),
+    )
@@ -0,0 +1,267 @@
+import asyncio
+import logging
+from typing import Collection, Dict, List, Optional, Sequence, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.database import (
+    AudienceIndex,
+    BroadcastJob,
+    CacheSync,
+    DeliveryStatus,
+    RequestsRepo,
+)
+from bot.services.broadcaster import Broadcaster, BroadcastStats, Delivery
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """
+    Delivers the broadcasts stored in the database outbox.
+
+    Handlers only write a job with its recipients and call notify(); the worker
+    claims recipients in batches, sends them through the broadcaster and
+    checkpoints the outcome of every batch. Jobs with a priority are delivered
+    first, and an urgent notification lets them cut in between two batches
+    of a large broadcast. Unfinished jobs are resumed when the
+    worker starts, so a broadcast survives restarts and deploys: an interrupted
+    batch is returned to the queue, and claims left behind by a killed worker
+    are requeued once they are older than claim_timeout. The claims are checked
+    at most once per poll_interval, and a job stays unfinished until none of
+    its recipients is being sent. Finished jobs are deleted with their recipients.
+
+    :param broadcaster: The broadcast engine used to deliver the messages.
+    :param session_maker: The asynchronous session maker for database interaction.
+    :param batch_size: The number of recipients claimed at once.
+    :param retry_delay: The number of seconds to wait after a failed run.
+    :param poll_interval: The number of seconds after which the outbox is checked
+                          even without a notification.
+    :param audience_index: (Optional) The index of category subscribers that
+                           users who blocked the bot are removed from.
+    :param claim_timeout: The number of seconds after which claimed recipients
+                          are considered abandoned.
+    :param cache_sync: (Optional) The channel users who blocked the bot are
+                       published to for the other instances of the bot.
+    """
+
+    def __init__(
+        self,
+        broadcaster: Broadcaster,
+        session_maker: async_sessionmaker,
+        batch_size: int = 200,
+        retry_delay: float = 30,
+        poll_interval: float = 60,
+        audience_index: Optional[AudienceIndex] = None,
+        claim_timeout: float = 900,
+        cache_sync: Optional[CacheSync] = None,
+    ) -> None:
+        self.broadcaster = broadcaster
+        self.session_maker = session_maker
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.audience_index = audience_index
+        self.claim_timeout = claim_timeout
+        self.cache_sync = cache_sync
+        self._event: asyncio.Event = asyncio.Event()
+        self._urgent: asyncio.Event = asyncio.Event()
+        self._requeued_at: Optional[float] = None
+
+    def notify(self, urgent: bool = False) -> None:
+        """
+        Wakes the worker up after a new job was committed to the outbox.
+
+        :param urgent: If True, the job has a priority and is delivered between
+                       two batches of the job the worker is busy with.
+        """
+        if urgent:
+            self._urgent.set()
+        self._event.set()
+
+    async def run(self) -> None:
+        """
+        Drains the outbox until cancelled, starting with the jobs left over
+        from a previous run.
+        """
+        while True:
+            self._event.clear()
+            try:
+                await self.requeue()
+            except Exception:
+                logger.exception("Failed to requeue abandoned recipients")
+            try:
+                await self.drain()
+            except Exception:
+                logger.exception("Failed to deliver broadcasts")
+                await asyncio.sleep(self.retry_delay)
+                continue
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def requeue(self) -> None:
+        """
+        Returns to the queue the recipients claimed by a worker that was killed
+        before it recorded the outcome of its batch.
+        Does nothing if the claims were checked less than poll_interval ago.
+        """
+        now: float = asyncio.get_running_loop().time()
+        if (
+            self._requeued_at is not None
+            and now - self._requeued_at < self.poll_interval
+        ):
+            return
+        self._requeued_at = now
+        session: AsyncSession
+        async with self.session_maker() as session:
+            repo: RequestsRepo = RequestsRepo(session)
+            requeued: int = await repo.broadcasts.requeue_stale(
+                timeout=self.claim_timeout
+            )
+            await repo.commit()
+        if requeued:
+            logger.warning("Requeued %s abandoned recipients", requeued)
+
+    async def drain_urgent(self) -> None:
+        """
+        Delivers the unfinished jobs with a priority, e.g. the catch-up posts
+        of new subscribers.
+        """
+        self._urgent.clear()
+        session: AsyncSession
+        async with self.session_maker() as session:
+            jobs: Sequence[BroadcastJob] = await RequestsRepo(
+                session
+            ).broadcasts.get_unfinished_jobs(min_priority=1)
+        for job in jobs:
+            await self.deliver(job)
+
+    async def drain(self) -> None:
+        """
+        Delivers every unfinished job in the outbox, oldest first.
+        A job whose recipients are still being sent is tried once per call,
+        and again on the next turn of the worker.
+        """
+        session: AsyncSession
+        delivered: Set[int] = set()
+        while True:
+            async with self.session_maker() as session:
+                jobs: Sequence[BroadcastJob] = await RequestsRepo(
+                    session
+                ).broadcasts.get_unfinished_jobs()
+            jobs = [job for job in jobs if job.id not in delivered]
+            if not jobs:
+                return
+            for job in jobs:
+                delivered.add(job.id)
+                await self.deliver(job)
+
+    @staticmethod
+    async def checkpoint(
+        repo: RequestsRepo,
+        job: BroadcastJob,
+        sent: Collection[int],
+        failed: Collection[int],
+    ) -> None:
+        """
+        Records the outcome of a batch together with the delivered posts.
+
+        :param repo: The repository for database requests.
+        :param job: The broadcast job the batch belongs to.
+        :param sent: The Telegram user IDs the message was delivered to.
+        :param failed: The Telegram user IDs the message could not be delivered to.
+        """
+        recorded: Sequence[int] = await repo.broadcasts.checkpoint(
+            job_id=job.id, sent=sent, failed=failed
+        )
+        if job.post_id:
+            await repo.posts.add_posts([(user_id, job.post_id) for user_id in recorded])
+
+    async def release(
+        self, job: BroadcastJob, user_ids: Sequence[int], sent: Collection[int]
+    ) -> None:
+        """
+        Records what an interrupted batch delivered and returns the rest of
+        its recipients to the queue, in a session of its own.
+
+        :param job: The broadcast job the batch belongs to.
+        :param user_ids: The Telegram user IDs claimed for the batch.
+        :param sent: The Telegram user IDs the message was delivered to.
+        """
+        session: AsyncSession
+        async with self.session_maker() as session:
+            repo: RequestsRepo = RequestsRepo(session)
+            await self.checkpoint(repo=repo, job=job, sent=sent, failed=())
+            await repo.broadcasts.release(
+                job_id=job.id, user_ids=set(user_ids).difference(sent)
+            )
+            await repo.commit()
+
+    async def deliver(self, job: BroadcastJob) -> None:
+        """
+        Delivers a single job batch by batch and reports the result to its chat
+        once the job is finished.
+
+        :param job: The broadcast job to deliver.
+        """
+        session: AsyncSession
+        async with self.session_maker() as session:
+            repo: RequestsRepo = RequestsRepo(
+                session, audience_index=self.audience_index, cache_sync=self.cache_sync
+            )
+            while True:
+                user_ids: Sequence[int] = await repo.broadcasts.claim_recipients(
+                    job_id=job.id, limit=self.batch_size
+                )
+                await repo.commit()
+                if not user_ids:
+                    break
+
+                sent: List[int] = []
+
+                async def on_sent(delivery: Delivery) -> None:
+                    sent.append(delivery.chat_id)
+
+                try:
+                    stats: BroadcastStats = await self.broadcaster.broadcast(
+                        deliveries=(
+                            Delivery(
+                                chat_id=user_id, text=job.text, post_id=job.post_id
+                            )
+                            for user_id in user_ids
+                        ),
+                        on_sent=on_sent,
+                    )
+                    await self.checkpoint(
+                        repo=repo,
+                        job=job,
+                        sent=sent,
+                        failed=set(user_ids).difference(sent),
+                    )
+                    await repo.users.mark_unreachable(stats.unreachable)
+                    await repo.commit()
+                except BaseException:
+                    await repo.rollback()
+                    await self.release(job=job, user_ids=user_ids, sent=sent)
+                    raise
+
+                if self._urgent.is_set() and not job.priority:
+                    await self.drain_urgent()
+
+            statistics: Optional[Dict[str, int]] = await repo.broadcasts.finish_job(
+                job.id
+            )
+            await repo.commit()
+
+        if statistics is None:
+            return
+        logger.info("Broadcast job %s finished: %s", job.id, statistics)
+        if job.chat_id:
+            await self.broadcaster.bot.send_message(
+                chat_id=job.chat_id,
+                text="Розсилку завершено ✅\n"
+                f"Доставлено - {statistics.get(DeliveryStatus.SENT, 0)}, "
+                f"не доставлено - {statistics.get(DeliveryStatus.FAILED, 0)}",
+            )
@@ -0,0 +1,123 @@
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple
+
+from redis.asyncio import Redis
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    The limit of a throttling key.
+
+    Attributes:
+        rate (float): The number of messages per second a chat may send on average.
+        burst (int): The number of messages a chat may send at once.
+    """
+
+    rate: float
+    burst: int = 1
+
+    @property
+    def interval(self) -> float:
+        """
+        The number of seconds one message costs.
+        """
+        return 1 / self.rate
+
+    @property
+    def tolerance(self) -> float:
+        """
+        The number of seconds a chat may run ahead of its rate.
+        """
+        return self.interval * (self.burst - 1)
+
+
+class RateLimiter:
+    """
+    A per-chat rate limiter implementing the generic cell rate algorithm (GCRA),
+    a token bucket that stores a single timestamp per active chat.
+
+    Without Redis the timestamps live in a dictionary and expired ones are swept
+    periodically, so its size follows the number of recently active chats.
+    With Redis they are keys that expire on their own, shared by every instance.
+
+    :param limits: The limit of every throttling key. Keys without a limit are
+                   not throttled.
+    :param redis: (Optional) The Redis client shared by all instances.
+    :param sweep_interval: The number of seconds between sweeps of expired chats.
+    """
+
+    script: str = """
+        local now = redis.call("TIME")
+        now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+        local tat = math.max(tonumber(redis.call("GET", KEYS[1]) or now), now)
+        if tat - now > tonumber(ARGV[2]) then
+            return 0
+        end
+        tat = tat + tonumber(ARGV[1])
+        redis.call("SET", KEYS[1], tostring(tat), "PX", math.ceil((tat - now) * 1000))
+        return 1
+    """
+
+    def __init__(
+        self,
+        limits: Mapping[str, RateLimit],
+        redis: Optional[Redis] = None,
+        sweep_interval: float = 60,
+    ) -> None:
+        self.limits = limits
+        self.redis = redis
+        self.sweep_interval = sweep_interval
+        self.allowed: Counter[str] = Counter()
+        self.rejected: Counter[str] = Counter()
+        self._arrivals: Dict[Tuple[str, int], float] = {}
+        self._swept: float = time.monotonic()
+        self._script = redis.register_script(self.script) if redis else None
+
+    def __len__(self) -> int:
+        return len(self._arrivals)
+
+    async def acquire(self, throttling_key: str, chat_id: int) -> bool:
+        """
+        Takes a message of a chat into account if the limit allows it.
+
+        :param throttling_key: The throttling key of the handler.
+        :param chat_id: The chat ID of the message.
+        :return: True if the message may be handled, False if it must be dropped.
+        """
+        limit: Optional[RateLimit] = self.limits.get(throttling_key)
+        if limit is None:
+            return True
+
+        if self._script is not None:
+            allowed: bool = bool(
+                await self._script(
+                    keys=[f"throttling:{throttling_key}:{chat_id}"],
+                    args=[limit.interval, limit.tolerance],
+                )
+            )
+        else:
+            allowed = self._acquire(throttling_key, chat_id, limit)
+
+        (self.allowed if allowed else self.rejected)[throttling_key] += 1
+        return allowed
+
+    def _acquire(self, throttling_key: str, chat_id: int, limit: RateLimit) -> bool:
+        """
+        The in-memory version of the GCRA check.
+        """
+        now: float = time.monotonic()
+        if now - self._swept >= self.sweep_interval:
+            self._arrivals = {
+                key: arrival for key, arrival in self._arrivals.items() if arrival > now
+            }
+            self._swept = now
+
+        key: Tuple[str, int] = (throttling_key, chat_id)
+        arrival: float = max(self._arrivals.get(key, now), now)
+        if arrival - now > limit.tolerance:
+            return False
+        self._arrivals[key] = arrival + limit.interval
+        return True
@@ -1,55 +1,131 @@
-import asyncio
-import json
-from pathlib import Path
-from typing import Dict, List, Set
-
-import aiofiles
-from aiogram import Bot, html
-from aiogram.exceptions import TelegramForbiddenError
+import logging
+from collections import defaultdict
+from typing import DefaultDict, Dict, Final, List, Optional
+
+from aiogram import html
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from bot.database import RequestsRepo
+from bot.database import PostContent, RequestsRepo
+from bot.services.outbox import Outbox
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+labels: Final[Dict[str, str]] = {
+    "youth_policy": "Молодіжна політика 📚",
+    "psychologist_support": "Підтримка психолога 🧘",
+    "civic_education": "Громадянська освіта 🏛",
+    "legal_support": "Юридична підтримка ⚖️",
+}
+
+
+def format_post(post_content: PostContent) -> str:
+    """
+    Formats a post the way subscribers receive it.
+
+    :param post_content: The content of the post.
+    :return: The text of the post prefixed with its category label.
+    """
+    label: str = html.bold(html.italic(labels[post_content.category]))
+    return f"{label}: {post_content.text}"
+
+
+async def catch_up(
+    user_id: int, category: str, repo: RequestsRepo, outbox: Outbox
+) -> bool:
+    """
+    Queues the oldest missed post of a category for a user who just subscribed to it.
+    The job has a priority, so it does not wait behind a large broadcast, and it is
+    committed before the outbox is notified, so the worker sees it.
+
+    :param user_id: The Telegram user ID.
+    :param category: The category the user subscribed to, e.g. "youth_policy".
+    :param repo: The repository for database requests.
+    :param outbox: The outbox the post is queued in.
+    :return: True if a post was queued, False if the user is up to date.
+    """
+    post_content: Optional[PostContent] = await repo.posts.get_pending_post(
+        user_id=user_id, category=category
+    )
+    if post_content is None:
+        return False
+
+    await repo.broadcasts.add_job(
+        text=format_post(post_content),
+        category=category,
+        post_id=post_content.id,
+        user_ids=[user_id],
+        priority=1,
+    )
+    await repo.commit()
+    outbox.notify(urgent=True)
+    return True
 
 
-async def schedule_post(bot: Bot, session_maker: async_sessionmaker) -> None:
+async def schedule_post(
+    outbox: Outbox,
+    session_maker: async_sessionmaker,
+    slot: int = 0,
+    slots: int = 1,
+    redis: Optional[Redis] = None,
+    lock_ttl: int = 3600,
+) -> None:
     """
-    Schedule and send posts to users based on the information stored in a JSON file.
+    Queues the missed posts that the subscription catch-up did not cover,
+    e.g. the older posts of a category or posts missed while the bot was down.
+    Every user receives at most one missed post per day, and the posts are
+    delivered by the outbox one job per post.
 
-    :param bot: The bot object used to interact with the Telegram API.
+    In the delivery-window mode users are split into slots by their ID and each
+    slot runs at its own time, so the daily volume is the same but only a
+    fraction of it is queued at once.
+
+    Every instance of the bot runs the job at the same time; with Redis only
+    the instance that takes the lock of the slot queues the posts.
+
+    :param outbox: The outbox the posts are queued in.
     :param session_maker: The asynchronous session maker for database interaction.
+    :param slot: The delivery slot to queue the posts for.
+    :param slots: The number of delivery slots.
+    :param redis: (Optional) The Redis client shared by all instances.
+    :param lock_ttl: The number of seconds the lock of the slot is held for.
     """
+    if redis is not None and not await redis.set(
+        f"schedule_post:{slot}", 1, nx=True, ex=lock_ttl
+    ):
+        return
+
     session: AsyncSession
-    file_path: Path = Path("/root/Personality/data/data.json")
-    id_users: Set = set()
-    category_mapping: Dict[int, str] = {
-        4: "Молодіжна політика 📚",
-        5: "Підтримка психолога 🧘",
-        6: "Громадянська освіта 🏛",
-        7: "Юридична підтримка ⚖️",
-    }
-
-    async with aiofiles.open(file_path, "r", encoding="utf-8") as json_file:
-        post_mapping = json.loads(await json_file.read(), parse_int=int)
+    recipients: DefaultDict[str, List[int]] = defaultdict(list)
 
     async with session_maker() as session:
         repo: RequestsRepo = RequestsRepo(session)
-        users: List[tuple] = await repo.users.get_all_users()
-        for post_id, post_data in post_mapping.items():
-            category = html.bold(
-                html.italic(category_mapping.get(post_data["category"]))
+        async for batch in repo.posts.get_pending_posts(
+            one_per_user=True, slot=slot, slots=slots
+        ):
+            for user_id, post_id in batch:
+                recipients[post_id].append(user_id)
+        if not recipients:
+            return
+
+        post_contents: Dict[str, PostContent] = (
+            await repo.post_contents.get_post_contents(post_ids=list(recipients))
+        )
+        for post_id, user_ids in recipients.items():
+            post_content: PostContent = post_contents[post_id]
+            await repo.broadcasts.add_job(
+                text=format_post(post_content),
+                category=post_content.category,
+                post_id=post_id,
+                user_ids=user_ids,
             )
-            for user in users:
-                user_id, subscription_category = user[0], user[post_data["category"]]
-                user_post = await repo.posts.get_user_post(
-                    user_id=user_id, post_id=post_id
-                )
-                if not user_post and subscription_category and user_id not in id_users:
-                    try:
-                        await bot.send_message(
-                            chat_id=user_id, text=f"{category}: {post_data['text']}"
-                        )
-                        await repo.posts.add_post(user_id=user[0], post_id=post_id)
-                        await asyncio.sleep(0.05)
-                        id_users.add(user_id)
-                    except TelegramForbiddenError:
-                        continue
+        await repo.commit()
+        backlog: int = await repo.broadcasts.count_pending()
+    outbox.notify()
+    logger.info(
+        "Delivery slot %s/%s queued %s missed posts, %s deliveries pending",
+        slot + 1,
+        slots,
+        sum(map(len, recipients.values())),
+        backlog,
+    )
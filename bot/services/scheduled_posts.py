@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+
+class ScheduledPosts:
+    """
+    The scheduled posts, stored as jobs in the persistent job store of the scheduler,
+    so they survive restarts. The job store is synchronous, so every call runs
+    in a worker thread.
+
+    APScheduler does not coordinate several schedulers sharing one job store:
+    every instance of the bot fires the same job. send_scheduled_post claims
+    the post in Redis, so only one of them sends it; without Redis only one
+    instance of the bot may run.
+
+    :param scheduler: The scheduler the jobs are added to.
+    :param jobstore: The alias of the persistent job store.
+    """
+
+    def __init__(self, scheduler: AsyncIOScheduler, jobstore: str = "posts") -> None:
+        self.scheduler = scheduler
+        self.jobstore = jobstore
+
+    async def add(
+        self,
+        job_id: str,
+        description: str,
+        run_date: datetime,
+        func: Callable[..., Any],
+        kwargs: Dict[str, Any],
+    ) -> None:
+        """
+        Schedules a post. A post whose time passed while the bot was down
+        is sent as soon as the bot starts again.
+
+        :param job_id: The identifier of the scheduled job.
+        :param description: The line shown in the list of scheduled posts.
+        :param run_date: The time the post is sent at.
+        :param func: The module-level coroutine function that sends the post.
+        :param kwargs: The serializable arguments of the function.
+        """
+        await asyncio.to_thread(
+            self.scheduler.add_job,
+            func=func,
+            trigger="date",
+            run_date=run_date,
+            id=job_id,
+            name=description,
+            kwargs=kwargs,
+            jobstore=self.jobstore,
+            misfire_grace_time=None,
+            coalesce=True,
+            replace_existing=True,
+        )
+
+    async def remove(self, job_id: str) -> None:
+        """
+        Cancels a scheduled post.
+
+        :param job_id: The identifier of the scheduled job.
+        """
+        try:
+            await asyncio.to_thread(
+                self.scheduler.remove_job, job_id=job_id, jobstore=self.jobstore
+            )
+        except JobLookupError:
+            pass
+
+    async def descriptions(self) -> List[str]:
+        """
+        Returns the descriptions of all scheduled posts, soonest first.
+
+        :return: The lines shown in the list of scheduled posts.
+        """
+        jobs: List[Job] = await asyncio.to_thread(
+            self.scheduler.get_jobs, jobstore=self.jobstore
+        )
+        return [job.name for job in jobs]
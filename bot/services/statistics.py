@@ -0,0 +1,31 @@
+from typing import List, Mapping, Union
+
+
+def format_statistics(counters: Mapping[str, int]) -> str:
+    """
+    Formats the user and subscription counters as the summary shown to admins.
+
+    :param counters: The counter names mapped to their values,
+                     e.g. {"users": 120, "youth_policy": 40, ...}.
+    :return: The text of the summary.
+    """
+    category_counts: List[int] = [
+        counters.get("youth_policy", 0),
+        counters.get("psychologist_support", 0),
+        counters.get("civic_education", 0),
+        counters.get("legal_support", 0),
+    ]
+    subscription_count: int = sum(category_counts)
+    category_percentages: List[Union[float, int]] = [
+        round((count / subscription_count) * 100, 1) if subscription_count > 0 else 0
+        for count in category_counts
+    ]
+
+    return (
+        f"Кількість користувачів у боті - {counters.get('users', 0)}\n"
+        f"Кількість підписок - {subscription_count}\n\n"
+        f"Молодіжна політика - {category_counts[0]} ({category_percentages[0]}%)\n"
+        f"Психологічна підтримка - {category_counts[1]} ({category_percentages[1]}%)\n"
+        f"Громадянська освіта - {category_counts[2]} ({category_percentages[2]}%)\n"
+        f"Юридична підтримка - {category_counts[3]} ({category_percentages[3]}%)\n"
+    )
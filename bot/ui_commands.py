@@ -17,6 +17,7 @@ async def set_admin_commands(bot: Bot, config: Config) -> None:
                 BotCommand(command="help", description="Допомога"),
                 BotCommand(command="post", description="Розсилка"),
                 BotCommand(command="db", description="База даних"),
+                BotCommand(command="stats", description="Статистика"),
             ],
             scope=BotCommandScopeChat(chat_id=chat_id),
         )
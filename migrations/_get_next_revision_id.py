@@ -0,0 +1,8 @@
+from pathlib import Path
+from typing import List
+
+versions: Path = Path(__file__).parent / "versions"
+revisions: List[int] = [
+    int(path.name.split("_")[0]) for path in versions.glob("[0-9]*_*.py")
+]
+print(f"{max(revisions, default=0) + 1:03}")
@@ -0,0 +1,87 @@
+import asyncio
+from logging.config import fileConfig
+from typing import Optional
+
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine, async_engine_from_config
+
+from bot.config import load_config
+from bot.database import Base
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+config.set_main_option(
+    "sqlalchemy.url",
+    load_config(path=".env").db.construct_sqlalchemy_url().replace("%", "%%"),
+)
+
+target_metadata = Base.metadata
+
+
+def include_name(name: Optional[str], type_: str, parent_names: dict) -> bool:
+    """
+    Limits autogenerate to the tables of the bot.
+    The scheduled posts table is created and owned by APScheduler.
+
+    :param name: The name of the database object.
+    :param type_: The type of the database object, e.g. "table".
+    :param parent_names: The names of the objects the object belongs to.
+    :return: True if the object is compared with the models.
+    """
+    if type_ == "table":
+        return name in target_metadata.tables
+    return True
+
+
+def run_migrations_offline() -> None:
+    """
+    Run migrations in 'offline' mode, emitting the SQL to the script output.
+    """
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        include_name=include_name,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    """
+    Run migrations in 'online' mode with an async engine.
+    """
+    connectable: AsyncEngine = async_engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_async_migrations())
@@ -0,0 +1,49 @@
+"""initial
+
+Revision ID: 001
+Revises:
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("user_id", sa.BIGINT(), nullable=False),
+        sa.Column("first_name", sa.String(length=128), nullable=False),
+        sa.Column("last_name", sa.String(length=128), nullable=True),
+        sa.Column("username", sa.String(length=128), nullable=True),
+        sa.Column("youth_policy", sa.BOOLEAN(), nullable=False),
+        sa.Column("psychologist_support", sa.BOOLEAN(), nullable=False),
+        sa.Column("civic_education", sa.BOOLEAN(), nullable=False),
+        sa.Column("legal_support", sa.BOOLEAN(), nullable=False),
+        sa.Column("youth_policy_topic", sa.INTEGER(), nullable=True),
+        sa.Column("psychologist_support_topic", sa.INTEGER(), nullable=True),
+        sa.Column("legal_support_topic", sa.INTEGER(), nullable=True),
+        sa.Column("active_category", sa.String(length=128), nullable=True),
+        sa.PrimaryKeyConstraint("user_id"),
+        sa.UniqueConstraint("user_id"),
+    )
+    op.create_table(
+        "posts",
+        sa.Column("id", sa.INTEGER(), nullable=False),
+        sa.Column("user_id", sa.BIGINT(), nullable=False),
+        sa.Column("post_id", sa.String(length=128), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("posts")
+    op.drop_table("users")
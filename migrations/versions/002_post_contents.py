@@ -0,0 +1,89 @@
+"""post contents
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-19 10:05:00.000000
+
+"""
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import insert
+
+revision: str = "002"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The posts used to be stored in data/data.json with the index of the category
+# column in the users row instead of its name.
+categories: Dict[int, str] = {
+    4: "youth_policy",
+    5: "psychologist_support",
+    6: "civic_education",
+    7: "legal_support",
+}
+
+
+def import_posts(post_contents: sa.Table) -> None:
+    """
+    Copies the posts from data.json into post_contents.
+    The file keeps the posts in the order they were published, which is
+    preserved through created_at.
+
+    The path can be overridden with the POSTS_JSON environment variable.
+    """
+    path: Path = Path(
+        os.getenv("POSTS_JSON", Path(__file__).parents[2] / "data" / "data.json")
+    )
+    if not path.exists():
+        return
+    posts: Dict[str, Dict[str, Any]] = json.loads(path.read_text(encoding="utf-8"))
+    if not posts:
+        return
+
+    published: datetime = datetime.now(timezone.utc) - timedelta(seconds=len(posts))
+    rows: List[Dict[str, Any]] = [
+        dict(
+            id=post_id,
+            category=categories[post["category"]],
+            text=post["text"],
+            created_at=published + timedelta(seconds=number),
+        )
+        for number, (post_id, post) in enumerate(posts.items())
+    ]
+    op.execute(insert(post_contents).values(rows).on_conflict_do_nothing())
+
+
+def upgrade() -> None:
+    op.create_index("ix_posts_user_id_post_id", "posts", ["user_id", "post_id"])
+    post_contents: sa.Table = op.create_table(
+        "post_contents",
+        sa.Column("id", sa.String(length=128), nullable=False),
+        sa.Column("category", sa.String(length=128), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_post_contents_category_created_at",
+        "post_contents",
+        ["category", "created_at"],
+    )
+    import_posts(post_contents)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_post_contents_category_created_at", table_name="post_contents")
+    op.drop_table("post_contents")
+    op.drop_index("ix_posts_user_id_post_id", table_name="posts")
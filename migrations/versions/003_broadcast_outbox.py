@@ -0,0 +1,82 @@
+"""broadcast outbox
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 10:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column(
+            "unreachable",
+            sa.BOOLEAN(),
+            server_default=sa.text("false"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "users",
+        sa.Column("unreachable_at", sa.TIMESTAMP(timezone=True), nullable=True),
+    )
+    op.create_table(
+        "broadcast_jobs",
+        sa.Column("id", sa.INTEGER(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("category", sa.String(length=128), nullable=True),
+        sa.Column("post_id", sa.String(length=128), nullable=True),
+        sa.Column("chat_id", sa.BIGINT(), nullable=True),
+        sa.Column(
+            "status", sa.String(length=16), server_default="pending", nullable=False
+        ),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_broadcast_jobs_pending",
+        "broadcast_jobs",
+        ["id"],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+    op.create_table(
+        "broadcast_recipients",
+        sa.Column("job_id", sa.INTEGER(), nullable=False),
+        sa.Column("user_id", sa.BIGINT(), nullable=False),
+        sa.Column(
+            "status", sa.String(length=16), server_default="pending", nullable=False
+        ),
+        sa.Column("claimed_at", sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["job_id"], ["broadcast_jobs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("job_id", "user_id"),
+    )
+    op.create_index(
+        "ix_broadcast_recipients_pending",
+        "broadcast_recipients",
+        ["job_id", "user_id"],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_broadcast_recipients_pending", table_name="broadcast_recipients")
+    op.drop_table("broadcast_recipients")
+    op.drop_index("ix_broadcast_jobs_pending", table_name="broadcast_jobs")
+    op.drop_table("broadcast_jobs")
+    op.drop_column("users", "unreachable_at")
+    op.drop_column("users", "unreachable")
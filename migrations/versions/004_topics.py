@@ -0,0 +1,74 @@
+"""topics
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 10:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from bot.config import TgBot, load_config
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The categories that had a *_topic column on users.
+categories: Sequence[str] = ("youth_policy", "psychologist_support", "legal_support")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "topics",
+        sa.Column("chat_id", sa.BIGINT(), nullable=False),
+        sa.Column("message_thread_id", sa.BIGINT(), nullable=False),
+        sa.Column("user_id", sa.BIGINT(), nullable=False),
+        sa.Column("category", sa.String(length=128), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.TIMESTAMP(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.user_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("chat_id", "message_thread_id"),
+    )
+    op.create_index(
+        "ix_topics_user_id_category", "topics", ["user_id", "category"], unique=True
+    )
+
+    # The topics of a category live in the admin chat of that category.
+    tg_bot: TgBot = load_config(path=".env").tg_bot
+    for category in categories:
+        op.execute(
+            sa.text(
+                "INSERT INTO topics (chat_id, message_thread_id, user_id, category) "
+                f"SELECT :chat_id, {category}_topic, user_id, :category FROM users "
+                f"WHERE {category}_topic IS NOT NULL "
+                "ON CONFLICT DO NOTHING"
+            ).bindparams(chat_id=getattr(tg_bot, category), category=category)
+        )
+
+    for category in categories:
+        op.drop_column("users", f"{category}_topic")
+
+
+def downgrade() -> None:
+    for category in categories:
+        op.add_column(
+            "users", sa.Column(f"{category}_topic", sa.INTEGER(), nullable=True)
+        )
+        op.execute(
+            sa.text(
+                f"UPDATE users SET {category}_topic = topics.message_thread_id "
+                "FROM topics "
+                "WHERE topics.user_id = users.user_id "
+                "AND topics.category = :category"
+            ).bindparams(category=category)
+        )
+    op.drop_index("ix_topics_user_id_category", table_name="topics")
+    op.drop_table("topics")
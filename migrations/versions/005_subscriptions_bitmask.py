@@ -0,0 +1,64 @@
+"""subscriptions bitmask
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 10:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The bit of every category, as in bot.database.models.user.Subscription.
+subscriptions: Sequence[tuple[str, int]] = (
+    ("youth_policy", 1),
+    ("psychologist_support", 2),
+    ("civic_education", 4),
+    ("legal_support", 8),
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column(
+            "subscriptions", sa.INTEGER(), server_default=sa.text("0"), nullable=False
+        ),
+    )
+    # | and << have the same precedence in PostgreSQL, hence the parentheses.
+    op.execute(
+        "UPDATE users SET subscriptions = "
+        "youth_policy::int "
+        "| (psychologist_support::int << 1) "
+        "| (civic_education::int << 2) "
+        "| (legal_support::int << 3)"
+    )
+    for category, bit in subscriptions:
+        op.drop_column("users", category)
+        op.create_index(
+            f"ix_users_{category}",
+            "users",
+            ["user_id"],
+            postgresql_where=sa.text(
+                f"subscriptions & {bit} <> 0 AND unreachable IS false"
+            ),
+        )
+
+
+def downgrade() -> None:
+    for category, bit in subscriptions:
+        op.drop_index(f"ix_users_{category}", table_name="users")
+        op.add_column(
+            "users",
+            sa.Column(
+                category, sa.BOOLEAN(), server_default=sa.text("false"), nullable=False
+            ),
+        )
+        op.execute(f"UPDATE users SET {category} = subscriptions & {bit} <> 0")
+    op.drop_column("users", "subscriptions")
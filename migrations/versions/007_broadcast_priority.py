@@ -0,0 +1,27 @@
+"""broadcast priority
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "broadcast_jobs",
+        sa.Column("priority", sa.SMALLINT(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("broadcast_jobs", "priority")
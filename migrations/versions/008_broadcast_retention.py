@@ -0,0 +1,26 @@
+"""broadcast retention
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Finished jobs are deleted from now on, their recipients cascade.
+    op.execute(sa.text("DELETE FROM broadcast_jobs WHERE status = 'done'"))
+    op.create_index("ix_broadcast_jobs_post_id", "broadcast_jobs", ["post_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_broadcast_jobs_post_id", table_name="broadcast_jobs")